@@ -1,9 +1,15 @@
-from typing import List, Optional, TypedDict
+from typing import Iterable, List, NotRequired, Optional, TypedDict
 from collections import Counter
-import re
-from textblob import TextBlob
+import metrics
+from keywords import get_tokenizer
+from sentiment import score_titles
 
 # --- تعريف أنواع البيانات لتحسين قراءة الكود وتقليل الأخطاء ---
+class RegionRank(TypedDict):
+    geo: str
+    rank: int
+    traffic: int
+
 class Post(TypedDict):
     platform: str
     title: str
@@ -14,18 +20,49 @@ class Post(TypedDict):
     channel: str
     published_time: str
     summary: str
+    # ترتيب التريند وحجم البحث عنه في كل منطقة ظهر فيها (لتريندات جوجل فقط)
+    regions: NotRequired[List[RegionRank]]
+    # المنشور من آخر جلب ناجح لمصدر متعطل وليس قياساً جديداً (لا يُسجل في السجل التاريخي ولا في السرعة)
+    stale: NotRequired[bool]
 
 class SentimentInfo(TypedDict):
     post: Post
     sentiment: float
 
+class RisingInfo(TypedDict):
+    post: Post
+    velocity: float       # مشاهدات في الساعة (متوسط متحرك أسي)
+    acceleration: float   # تغير السرعة في الساعة
+    zscore: float         # بعد آخر سرعة عن متوسطها بوحدات الانحراف المعياري
+    anomaly: bool
+
+class RisingKeyword(TypedDict):
+    keyword: str
+    velocity: float
+    zscore: float
+    anomaly: bool
+
 class AnalysisResults(TypedDict):
     most_viewed: Post
     most_liked: Post
     most_loved: SentimentInfo
     most_hated: SentimentInfo
     top_keywords: List[tuple[str, int]]
+    # الأسرع صعوداً بين لقطتين متتاليتين (تضيفها طبقة تتبع السرعة عند تفعيلها)
+    fastest_rising: NotRequired[List[RisingInfo]]
+    rising_keywords: NotRequired[List[RisingKeyword]]
+    # أكثر الكلمات تكراراً خلال النافذة الزمنية الأخيرة (تقريبية، من ملخص Space-Saving)
+    window_keywords: NotRequired[List[tuple[str, int]]]
 
+def count_keywords(titles: Iterable[str], chunk_size: int = 4096) -> Counter[str]:
+    """يحسب تكرار الكلمات المفيدة (بعد توحيد الكتابة العربية وحذف كلمات التوقف) في العناوين."""
+    return get_tokenizer().count(titles, chunk_size)
+
+def title_words(title: str) -> List[str]:
+    """نفس تقطيع count_keywords لكن لعنوان واحد."""
+    return get_tokenizer().tokenize(title)
+
+@metrics.timed('trend_stage_seconds', stage='analyze')
 def analyze_trends(posts: List[Post]) -> Optional[AnalysisResults]:
     """تقوم هذه الدالة بتحليل قائمة المنشورات المستلمة."""
     if not posts:
@@ -34,27 +71,24 @@ def analyze_trends(posts: List[Post]) -> Optional[AnalysisResults]:
 
     print("جاري تحليل البيانات المستلمة...")
 
-    sentiments: List[SentimentInfo] = []
-    for post in posts:
-        sentiment = TextBlob(post['title']).sentiment.polarity
-        sentiments.append({'post': post, 'sentiment': sentiment})
+    # تقييم كل العناوين دفعة واحدة، مع الاستفادة من ذاكرة المشاعر للعناوين المتكررة
+    scores = score_titles([post['title'] for post in posts])
+    sentiments: List[SentimentInfo] = [
+        {'post': post, 'sentiment': sentiment} for post, sentiment in zip(posts, scores)
+    ]
     
     if not sentiments:
         print("فشل تحليل المشاعر، لا يمكن المتابعة.")
         return None
 
-    all_titles = ' '.join(p['title'] for p in posts)
-    words = re.findall(r'\b\w+\b', all_titles.lower())
-    
-    stop_words = set(['من', 'عن', 'في', 'و', 'أو', 'إلى', 'هو', 'هي', 'هذا', 'هذه', 'جدا', 'تم', 'علي', 'مع', 'بعد', 'أن'])
-    meaningful_words = [word for word in words if word not in stop_words and not word.isdigit()]
-    word_counts = Counter(meaningful_words)
+    word_counts = count_keywords(p['title'] for p in posts)
 
+    # max/min تعيد أول عنصر عند التساوي، تماماً مثل العنصر الأول بعد الفرز المستقر
     analysis: AnalysisResults = {
-        'most_viewed': sorted(posts, key=lambda p: p['views'], reverse=True)[0],
-        'most_liked': sorted(posts, key=lambda p: p['likes'], reverse=True)[0],
-        'most_loved': sorted(sentiments, key=lambda s: s['sentiment'], reverse=True)[0],
-        'most_hated': sorted(sentiments, key=lambda s: s['sentiment'])[0],
+        'most_viewed': max(posts, key=lambda p: p['views']),
+        'most_liked': max(posts, key=lambda p: p['likes']),
+        'most_loved': max(sentiments, key=lambda s: s['sentiment']),
+        'most_hated': min(sentiments, key=lambda s: s['sentiment']),
         'top_keywords': word_counts.most_common(5)
     }
     return analysis
@@ -1,22 +1,142 @@
-from flask import Flask, render_template
-from scraper import fetch_all_trends
-from analyzer import analyze_trends
+import atexit
+import os
+import time
+from typing import Any, Iterable, Iterator, Union
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+import metrics
+from pipeline import AnalysisPipeline, attach_export, attach_history
+from refresher import RefreshScheduler
+from snapshot_store import SNAPSHOT_PATH, SnapshotStore
 
 app = Flask(__name__)
 
+# عدد أجزاء القالب التي تُجمع قبل إرسالها للمتصفح أثناء البث
+STREAM_BUFFER_SIZE = int(os.getenv("TREND_STREAM_BUFFER_SIZE", "40"))
+API_DEFAULT_PER_PAGE = 50
+API_MAX_PER_PAGE = 500
+# تشغيل الجلب في الخلفية عبر المسار غير المتزامن (async_scraper، يتطلب aiohttp) بدلاً من مجمع الخيوط
+ASYNC_FETCH = os.getenv("TREND_ASYNC_FETCH", "0") == "1"
+
+scheduler: Union[RefreshScheduler, SnapshotStore]
+if SNAPSHOT_PATH:
+    # وضع القراءة فقط: الجلب والتحليل في عملية worker.py منفصلة، وكل عمليات الويب تقرأ نفس اللقطة المنشورة
+    scheduler = SnapshotStore(SNAPSHOT_PATH)
+else:
+    # جدولة التحديث في الخلفية داخل عملية الويب: الصفحة تقرأ آخر لقطة فقط ولا تقوم بالكشط أثناء الطلب
+    if ASYNC_FETCH:
+        from async_scraper import AsyncTrendFetcher
+
+        fetcher = AsyncTrendFetcher()
+        scheduler = RefreshScheduler(fetch=fetcher, analyze=AnalysisPipeline())
+        atexit.register(fetcher.close)
+    else:
+        scheduler = RefreshScheduler(analyze=AnalysisPipeline())
+    attach_history(scheduler)
+    attach_export(scheduler)
+
+def _stream_template(template_name: str, **context: Any) -> Response:
+    """
+    يبث القالب على دفعات: رأس الصفحة وبطاقات التحليل تصل أولاً، ثم بطاقات المنشورات تباعاً،
+    بدلاً من بناء الصفحة كاملة في الذاكرة قبل الإرسال.
+    """
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return Response(stream_with_context(_timed_render(stream)), mimetype='text/html')
+
+def _timed_render(chunks: Iterable[str]) -> Iterator[str]:
+    """يقيس زمن توليد القالب فقط، دون زمن انتظار إرسال الدفعات عبر الشبكة."""
+    elapsed = 0.0
+    iterator = iter(chunks)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+            yield chunk
+    except Exception:
+        metrics.inc('trend_errors_total', stage='render')
+        raise
+    finally:
+        metrics.observe('trend_stage_seconds', elapsed, stage='render')
+
+def _render_dashboard() -> Response:
+    """يعرض آخر لقطة في الصفحة الرئيسية، أو صفحة "جاري التجهيز" إذا لم يكتمل أول تحديث بعد."""
+    scheduler.start()
+    snapshot = scheduler.latest()
+
+    if snapshot is None:
+        return _stream_template('index.html', analysis=None, posts=[], snapshot_age=None)
+
+    return _stream_template(
+        'index.html',
+        analysis=snapshot.analysis,
+        posts=snapshot.posts,
+        snapshot_age=int(snapshot.age),
+    )
+
 @app.route('/')
 def home():
     """
-    الصفحة الرئيسية التي تجلب البيانات، تحللها، ثم تعرضها.
+    الصفحة الرئيسية التي تعرض آخر لقطة من البيانات المحللة.
     """
-    # 1. جلب البيانات
-    all_posts = fetch_all_trends()
-    
-    # 2. تحليل البيانات
-    analysis_results = analyze_trends(all_posts)
-    
-    # 3. عرض النتائج في الواجهة
-    return render_template('index.html', analysis=analysis_results, posts=all_posts)
+    return _render_dashboard()
+
+@app.route('/live')
+async def live_dashboard():
+    """
+    نسخة غير متزامنة من الصفحة الرئيسية (تتطلب Flask[async]). تحت خادم WSGI يشغّلها Flask عبر asgiref
+    في خيط الطلب نفسه، لذا لا تنتظر أي عمل غير متزامن وتعرض آخر لقطة فوراً مثل الصفحة الرئيسية.
+    """
+    return _render_dashboard()
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """مقاييس الأداء بصيغة Prometheus النصية."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/trends')
+def api_trends():
+    """
+    واجهة JSON مقسمة إلى صفحات لآخر لقطة، مع ETag حتى يتجاوز العملاء والوسطاء البيانات التي لم تتغير.
+    """
+    scheduler.start()
+    snapshot = scheduler.latest()
+    if snapshot is None:
+        response = jsonify({'error': "لم يكتمل أول تحديث للبيانات بعد."})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+
+    page = max(1, request.args.get('page', 1, type=int) or 1)
+    per_page = min(API_MAX_PER_PAGE, max(1, request.args.get('per_page', API_DEFAULT_PER_PAGE, type=int) or API_DEFAULT_PER_PAGE))
+
+    # الـ ETag مشتق من هوية اللقطة ورقم الصفحة، فلا حاجة لتسلسل البيانات للتحقق منه
+    etag = f"{int(snapshot.created_at * 1000)}-{snapshot.version}-{page}-{per_page}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    total = len(snapshot.posts)
+    start = (page - 1) * per_page
+    response = jsonify({
+        'generated_at': snapshot.created_at,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'analysis': snapshot.analysis,
+        'posts': snapshot.posts.to_posts(start, start + per_page),
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 if __name__ == "__main__":
     print("="*50)
@@ -0,0 +1,166 @@
+import codecs
+import os
+import threading
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+# أقصى عدد بايتات يُقرأ من المقال قبل التوقف حتى لو لم يكتمل النص المطلوب
+ARTICLE_MAX_BYTES = int(os.getenv("TREND_ARTICLE_MAX_BYTES", str(1024 * 1024)))
+ARTICLE_CHUNK_SIZE = int(os.getenv("TREND_ARTICLE_CHUNK_SIZE", "16384"))
+# مدة صلاحية النص المستخلص لكل رابط (بالثواني)، وأقصى عدد روابط محفوظة
+ARTICLE_CACHE_TTL = float(os.getenv("TREND_ARTICLE_CACHE_TTL", "3600"))
+ARTICLE_CACHE_MAX_ENTRIES = int(os.getenv("TREND_ARTICLE_CACHE_MAX_ENTRIES", "1024"))
+
+# الوسوم التي تُغلق الفقرة المفتوحة ضمنياً حسب مواصفة HTML (كما يفعل lxml)
+_P_CLOSERS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'details', 'dialog', 'div', 'dl', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+    'hgroup', 'hr', 'main', 'menu', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'ul',
+})
+_SKIPPED = frozenset({'script', 'style', 'template'})
+
+class ParagraphExtractor(HTMLParser):
+    """
+    محلل HTML تزايدي يجمع نص وسوم <p> فقط، ويتوقف عن العمل بمجرد جمع max_chars حرفاً.
+    الناتج يطابق ' '.join(p.get_text() for p in soup.find_all('p'))[:max_chars] في الصفحات المعتادة،
+    دون بناء شجرة للصفحة كاملة.
+    """
+
+    def __init__(self, max_chars: int) -> None:
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._paragraphs: List[str] = []
+        self._current: Optional[List[str]] = None
+        self._length = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in _SKIPPED:
+            self._skip_depth += 1
+        elif tag in _P_CLOSERS:
+            self._close_paragraph()
+            if tag == 'p':
+                self._current = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'p' or (tag in _P_CLOSERS and self._current is not None):
+            self._close_paragraph()
+
+    def handle_data(self, data: str) -> None:
+        if self._current is not None and not self._skip_depth:
+            self._current.append(data)
+
+    def _close_paragraph(self) -> None:
+        if self._current is None:
+            return
+        text = ''.join(self._current)
+        self._current = None
+        # طول النص المجمّع مع المسافات الفاصلة بين الفقرات
+        self._length += len(text) + (1 if self._paragraphs else 0)
+        self._paragraphs.append(text)
+        if self._length >= self.max_chars:
+            self.done = True
+
+    def text(self) -> str:
+        """النص المجمّع حتى الآن (مع الفقرة غير المغلقة إن وجدت)، مقصوصاً إلى max_chars."""
+        paragraphs = self._paragraphs
+        if self._current is not None:
+            paragraphs = paragraphs + [''.join(self._current)]
+        return ' '.join(paragraphs)[:self.max_chars]
+
+class ArticleExtractor:
+    """
+    يستقبل جسم الرد على دفعات من البايتات (من أي مصدر متزامن أو غير متزامن) ويمررها للمحلل التزايدي.
+    feed تعيد True عندما يجب إيقاف القراءة: اكتمل النص المطلوب أو بلغت البايتات المقروءة الحد الأقصى.
+    """
+
+    def __init__(self, max_chars: int, max_bytes: int = ARTICLE_MAX_BYTES, encoding: Optional[str] = None) -> None:
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self._parser = ParagraphExtractor(max_chars)
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    @property
+    def done(self) -> bool:
+        return self._parser.done or self.bytes_read >= self.max_bytes
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done:
+            return True
+        chunk = chunk[:self.max_bytes - self.bytes_read]
+        self.bytes_read += len(chunk)
+        self._parser.feed(self._decoder.decode(chunk))
+        return self.done
+
+    def text(self) -> str:
+        return self._parser.text()
+
+def extract_text(html: str, max_chars: int) -> str:
+    """يستخلص نص الفقرات من صفحة كاملة موجودة في الذاكرة."""
+    parser = ParagraphExtractor(max_chars)
+    parser.feed(html)
+    return parser.text()
+
+class ArticleTextCache:
+    """
+    ذاكرة في الذاكرة للنص المستخلص لكل رابط، بصلاحية زمنية وإزالة الأقل استخداماً (LRU).
+    النص المنتهي صلاحيته يبقى مع محددات الخادم (ETag / Last-Modified) حتى يُعاد التحقق منه بطلب شرطي
+    بدلاً من تنزيل المقال من جديد.
+    """
+
+    def __init__(self, ttl: float = ARTICLE_CACHE_TTL, max_entries: int = ARTICLE_CACHE_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # الرابط -> (النص، وقت الجلب، ETag، Last-Modified)
+        self._entries: 'OrderedDict[str, Tuple[str, float, Optional[str], Optional[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[str]:
+        """النص المحفوظ إن كان ما زال صالحاً."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or time.time() - entry[1] > self.ttl:
+                return None
+            self._entries.move_to_end(url)
+            return entry[0]
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """ترويسات الطلب الشرطي (If-None-Match / If-Modified-Since) للنص المحفوظ، إن أرسل الخادم محددات له."""
+        with self._lock:
+            entry = self._entries.get(url)
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry[2]:
+                headers['If-None-Match'] = entry[2]
+            if entry[3]:
+                headers['If-Modified-Since'] = entry[3]
+        return headers
+
+    def revalidated(self, url: str) -> Optional[str]:
+        """يجدد صلاحية النص المحفوظ بعد رد 304 ويعيده."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            self._entries[url] = (entry[0], time.time(), entry[2], entry[3])
+            self._entries.move_to_end(url)
+            return entry[0]
+
+    def put(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries[url] = (text, time.time(), etag, last_modified)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,209 @@
+"""
+النسخة غير المتزامنة (asyncio) من طبقة المصادر، للتشغيل تحت خادم ASGI أو داخل عملية الجلب:
+كل الطلبات (صفحة يوتيوب، RSS جوجل لكل منطقة، المقالات واستدعاءات النموذج) تجري في خيط واحد،
+والمصدر الذي يتجاوز مهلته يُلغى فعلياً بدلاً من تركه يعمل في الخلفية كما في المسار المتزامن.
+التحليل (HTML وRSS) مشترك مع scraper.py، ويتطلب هذا المسار مكتبة aiohttp.
+"""
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+import metrics
+from analyzer import Post
+from httpcache import AsyncHttpClient
+from scraper import (FETCH_BUDGET, GOOGLE_TRENDS_GEOS, GOOGLE_TRENDS_PER_GEO, GOOGLE_TRENDS_RSS,
+                     SOURCES, YOUTUBE_HEADERS, YOUTUBE_TRENDING_URL, SourceStatus, _parse_google_trends_rss,
+                     _report_stale, _source_failed, _source_finished, _source_skipped, merge_regional_trends,
+                     parse_youtube_trending)
+from resilience import get_breaker
+from summarizer import summarize_many_async
+
+AsyncFetch = Callable[[AsyncHttpClient], Awaitable[List[Post]]]
+
+async def scrape_youtube_trending(client: AsyncHttpClient) -> List[Post]:
+    """يجلب أحدث التريندات من يوتيوب دون حجز خيط أثناء انتظار الشبكة."""
+    print("جاري جلب تريند يوتيوب (غير متزامن)...")
+    with metrics.timer('trend_stage_seconds', stage='youtube'):
+        try:
+            response = await client.get(YOUTUBE_TRENDING_URL, headers=YOUTUBE_HEADERS, timeout=15)
+            response.raise_for_status()
+            # تحليل الصفحة عمل حسابي، لذا يتم في خيط منفصل حتى لا يوقف بقية الطلبات
+            return await asyncio.to_thread(parse_youtube_trending, response.content)
+        except requests.exceptions.RequestException as e:
+            print(f"حدث خطأ في الشبكة أثناء جلب بيانات يوتيوب: {e}")
+            metrics.inc('trend_errors_total', stage='youtube')
+            return []
+        except Exception as e:
+            print(f"حدث خطأ غير متوقع أثناء جلب بيانات يوتيوب: {e}")
+            metrics.inc('trend_errors_total', stage='youtube')
+            return []
+
+async def _fetch_google_trends_geo(client: AsyncHttpClient, geo: str, limit: int) -> List[Post]:
+    response = await client.get(GOOGLE_TRENDS_RSS.format(geo=geo), timeout=10)
+    response.raise_for_status()
+    return _parse_google_trends_rss(response.content, geo, limit)
+
+async def scrape_google_trends(client: AsyncHttpClient, geos: Optional[Sequence[str]] = None,
+                               limit: int = GOOGLE_TRENDS_PER_GEO) -> List[Post]:
+    """يجلب تريندات جوجل لكل المناطق بالتزامن، ثم يدمجها ويلخص مقالاتها بالتزامن أيضاً."""
+    geos = [geo.upper() for geo in (geos if geos is not None else GOOGLE_TRENDS_GEOS)]
+    print(f"جاري جلب تريندات مؤشرات جوجل للمناطق (غير متزامن): {', '.join(geos)}...")
+    if not geos:
+        return []
+
+    with metrics.timer('trend_stage_seconds', stage='google_trends'):
+        results = await asyncio.gather(*(_fetch_google_trends_geo(client, geo, limit) for geo in geos),
+                                       return_exceptions=True)
+        per_geo: List[List[Post]] = []
+        for geo, result in zip(geos, results):
+            if isinstance(result, requests.exceptions.RequestException):
+                print(f"حدث خطأ في الشبكة أثناء جلب بيانات مؤشرات جوجل ({geo}): {result}")
+                metrics.inc('trend_errors_total', stage='google_trends')
+            elif isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                print(f"حدث خطأ غير متوقع أثناء جلب بيانات مؤشرات جوجل ({geo}): {result}")
+                metrics.inc('trend_errors_total', stage='google_trends')
+            else:
+                per_geo.append(result)
+
+        google_trends = merge_regional_trends(per_geo)
+        summaries = await summarize_many_async((post['url'] for post in google_trends), client)
+        for post in google_trends:
+            post['summary'] = summaries.get(post['url'], "لا يوجد رابط صالح للتلخيص.")
+    metrics.inc('trend_items_parsed_total', len(google_trends), source='google_trends')
+    return google_trends
+
+# --- سجل المصادر غير المتزامنة: نفس أسماء ومهل سجل scraper.SOURCES ---
+ASYNC_SOURCES: Dict[str, AsyncFetch] = {}
+
+def register_async_source(name: str, fetch: AsyncFetch) -> None:
+    """يضيف النسخة غير المتزامنة لمصدر مسجل في scraper.SOURCES (المهلة تؤخذ من هناك)."""
+    ASYNC_SOURCES[name] = fetch
+
+register_async_source('youtube', scrape_youtube_trending)
+register_async_source('google_trends', scrape_google_trends)
+
+async def fetch_all_trends_with_status(budget: float = FETCH_BUDGET,
+                                       client: Optional[AsyncHttpClient] = None
+                                       ) -> Tuple[List[Post], Dict[str, SourceStatus]]:
+    """
+    يشغّل كل المصادر بالتزامن ويجمع نتيجة كل مصدر فور انتهائه، مثل scraper.fetch_all_trends_with_status.
+    المصدر الذي يتجاوز مهلته (أو الميزانية الكلية) يُلغى مع كل طلباته الجارية ويُسجّل في قاموس الحالة.
+    المصادر المسجلة في scraper.SOURCES دون نسخة غير متزامنة تعمل في خيط منفصل ولا يمكن إلغاؤها.
+    """
+    if client is None:
+        async with AsyncHttpClient() as own_client:
+            return await fetch_all_trends_with_status(budget, own_client)
+
+    start = time.monotonic()
+    sources = list(SOURCES.values())
+    results: Dict[str, List[Post]] = {}
+    statuses: Dict[str, SourceStatus] = {}
+    tasks: Dict['asyncio.Task[List[Post]]', Tuple[str, float]] = {}
+    for source in sources:
+        # نفس قواطع المصادر وآخر بياناتها الناجحة المستخدمة في المسار المتزامن
+        if not get_breaker(source.name).allow():
+            results[source.name], statuses[source.name] = _source_skipped(source.name)
+            continue
+        fetch = ASYNC_SOURCES.get(source.name)
+        coro = fetch(client) if fetch is not None else asyncio.to_thread(source.fetch)
+        task = asyncio.create_task(coro, name=f"trend-source-{source.name}")
+        tasks[task] = (source.name, start + min(source.deadline, budget))
+
+    pending = set(tasks)
+    try:
+        while pending:
+            next_deadline = min(tasks[t][1] for t in pending)
+            done, pending = await asyncio.wait(pending, timeout=max(0.0, next_deadline - time.monotonic()),
+                                               return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                name, _ = tasks[task]
+                elapsed = time.monotonic() - start
+                try:
+                    posts = task.result()
+                except Exception as e:
+                    print(f"فشل المصدر {name}: {e}")
+                    results[name], statuses[name] = _source_failed(name, str(e), elapsed)
+                    continue
+                results[name], statuses[name] = _source_finished(name, posts, elapsed)
+
+            now = time.monotonic()
+            expired = {t for t in pending if tasks[t][1] <= now}
+            for task in expired:
+                name, _ = tasks[task]
+                task.cancel()
+                print(f"تجاوز المصدر {name} المهلة المحددة وتم إلغاؤه في هذا التحديث.")
+                results[name], statuses[name] = _source_failed(name, 'timeout', now - start)
+            pending -= expired
+    finally:
+        # عند إلغاء الجلب نفسه (مثلاً إغلاق الخادم) تُلغى كل المصادر الجارية معه
+        for task in pending:
+            task.cancel()
+            get_breaker(tasks[task][0]).release()
+
+    # الدمج بترتيب السجل لضمان ثبات ترتيب المنشورات بين التحديثات
+    all_posts: List[Post] = []
+    for source in sources:
+        all_posts.extend(results.get(source.name, []))
+    return all_posts, statuses
+
+async def fetch_all_trends(budget: float = FETCH_BUDGET, client: Optional[AsyncHttpClient] = None) -> List[Post]:
+    """دالة رئيسية غير متزامنة لتجميع التريندات من كل المصادر المتاحة."""
+    print("="*40)
+    print("بدء عملية جلب التريندات من جميع المصادر (غير متزامن)...")
+
+    all_posts, statuses = await fetch_all_trends_with_status(budget, client)
+
+    print(f"\nتم جلب ما مجموعه {len(all_posts)} منشوراً من جميع المصادر.")
+    _report_stale(statuses)
+    return all_posts
+
+class AsyncTrendFetcher:
+    """
+    دالة fetch لـ RefreshScheduler تشغّل الجلب غير المتزامن من خيط المجدول: حلقة أحداث واحدة تعمل
+    في خيط خاص وعميل AsyncHttpClient واحد (جلسة aiohttp واتصالاتها المفتوحة) طوال عمر المجدول،
+    بدلاً من إنشاء حلقة وجلسة جديدتين في كل تحديث.
+    """
+
+    def __init__(self, budget: float = FETCH_BUDGET) -> None:
+        self.budget = budget
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[AsyncHttpClient] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="trend-async-fetch", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _fetch(self) -> List[Post]:
+        # الجلسة تُنشأ داخل الحلقة التي ستُستخدم فيها
+        if self._client is None:
+            self._client = await AsyncHttpClient().__aenter__()
+        return await fetch_all_trends(self.budget, self._client)
+
+    def __call__(self) -> List[Post]:
+        return asyncio.run_coroutine_threadsafe(self._fetch(), self._start()).result()
+
+    def close(self) -> None:
+        """يغلق الجلسة ويوقف حلقة الأحداث وخيطها."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), loop).result()
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
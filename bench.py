@@ -0,0 +1,867 @@
+"""
+أدوات قياس الأداء لمكونات التطبيق.
+مثال: python bench.py yt-extract fixtures/youtube/*.html
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import zlib
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, TypedDict
+
+if TYPE_CHECKING:
+    from analyzer import Post
+
+def _timeit(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """ينفذ الدالة عدة مرات ويعيد زمن كل تنفيذ بالثواني."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def _report(label: str, timings: List[float]) -> float:
+    median = statistics.median(timings)
+    print(f"  {label:<28} median={median * 1000:9.2f}ms  min={min(timings) * 1000:9.2f}ms")
+    return median
+
+# --- استخراج ytInitialData ---
+
+def _legacy_yt_extract(html: str) -> Optional[Dict[str, Any]]:
+    """المسار القديم: بناء شجرة BeautifulSoup كاملة ثم البحث في السكربتات."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup.find_all('script'):
+        script_text = script.get_text()
+        if 'ytInitialData' in script_text:
+            json_data_str = script_text.split(' = ')[1]
+            if json_data_str.endswith(';'):
+                json_data_str = json_data_str[:-1]
+            return json.loads(json_data_str)
+    return None
+
+def _synthetic_trending_page(videos: int) -> bytes:
+    """صفحة تريند اصطناعية بحجم قريب من الصفحة الحقيقية عند عدم توفر صفحات محفوظة."""
+    items = [
+        {'richItemRenderer': {'content': {'videoRenderer': {
+            'videoId': f'vid{i:06d}',
+            'title': {'runs': [{'text': f'فيديو رائج رقم {i}: عنوان تجريبي'}]},
+            'viewCountText': {'simpleText': f'{i * 1000:,} views'},
+            'thumbnail': {'thumbnails': [{'url': f'https://i.ytimg.com/vi/{i}/hq.jpg'}]},
+        }}}}
+        for i in range(videos)
+    ]
+    data = {'contents': {'twoColumnBrowseResultsRenderer': {'tabs': [{'tabRenderer': {
+        'content': {'richGridRenderer': {'contents': items}}}}]}}}
+    filler = '<div class="x">' + 'محتوى ' * 50 + '</div>\n'
+    page = (
+        '<html><head><script>var ytcfg = {"a": 1};</script></head><body>'
+        + filler * 2000
+        + '<script nonce="n">var ytInitialData = ' + json.dumps(data, ensure_ascii=False) + ';</script>'
+        + filler * 500
+        + '</body></html>'
+    )
+    return page.encode('utf-8')
+
+def bench_yt_extract(paths: List[str], repeat: int, synthetic: int) -> None:
+    from yt_extract import JSON_BACKEND, extract_yt_initial_data
+
+    pages: Dict[str, bytes] = {}
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'rb') as f:
+                pages[path] = f.read()
+    if not pages:
+        print(f"لم يتم العثور على صفحات محفوظة، سيتم استخدام صفحة اصطناعية بـ {synthetic} فيديو.")
+        pages['<synthetic>'] = _synthetic_trending_page(synthetic)
+
+    print(f"JSON backend: {JSON_BACKEND}")
+    for name, body in pages.items():
+        print(f"{name} ({len(body) / 1024:.0f} KiB)")
+        html = body.decode('utf-8', errors='replace')
+        try:
+            legacy_data = _legacy_yt_extract(html)
+        except ValueError as e:
+            # المسار القديم يقسم السكربت عند أول ' = ' فيفشل إذا ظهرت داخل العناوين
+            print(f"  المسار القديم يفشل في هذه الصفحة: {e}")
+            legacy_data = None
+        else:
+            if legacy_data != extract_yt_initial_data(body):
+                print("  تحذير: نتيجة المستخرج الجديد تختلف عن المسار القديم!")
+        fast = _report('extract_yt_initial_data', _timeit(lambda: extract_yt_initial_data(body), repeat))
+        if legacy_data is not None:
+            legacy = _report('legacy (BeautifulSoup)', _timeit(lambda: _legacy_yt_extract(html), repeat))
+            print(f"  speedup: x{legacy / fast:.1f}")
+
+# --- تحليل الدفعات ---
+
+_WORDS = ['هاتف', 'جديد', 'تحدي', 'الطبخ', 'نقاش', 'قانون', 'العمل', 'صور', 'حفل', 'الجوائز',
+          'إطلاق', 'صاروخ', 'مباراة', 'الهلال', 'النصر', 'match', 'highlights', 'new', 'song', 'trailer']
+
+def _synthetic_posts(count: int, seed: int = 0) -> List['Post']:
+    import random
+
+    rng = random.Random(seed)
+    return [
+        {
+            'platform': rng.choice(['YouTube', 'Google Trends']),
+            'title': ' '.join(rng.choices(_WORDS, k=6)),
+            'views': rng.randrange(10_000_000),
+            'likes': rng.randrange(100_000),
+            'url': f'https://youtube.com/watch?v=v{i}',
+            'thumbnail': '',
+            'channel': f'channel {i % 500}',
+            'published_time': '',
+            'summary': '',
+        }
+        for i in range(count)
+    ]
+
+class _StubScorer:
+    """محلل مشاعر ثابت ورخيص لعزل زمن التجميع عن زمن محلل المشاعر."""
+    name = 'stub'
+
+    def score_batch(self, titles: Sequence[str]) -> List[float]:
+        return [(zlib.crc32(title.encode('utf-8')) % 2001 - 1000) / 1000 for title in titles]
+
+def _baseline_analyze_trends(posts: List['Post'], polarity: Callable[[str], float]) -> Dict[str, Any]:
+    """
+    analyze_trends كما كانت قبل سلسلة التحسينات: تقييم كل عنوان على حدة، دمج كل العناوين في نص واحد،
+    وأربع عمليات فرز كاملة لأخذ العنصر الأول فقط. المقيّم يُمرر حتى لا يطغى زمن TextBlob على المقارنة.
+    """
+    import re
+    from collections import Counter
+
+    sentiments = [{'post': post, 'sentiment': polarity(post['title'])} for post in posts]
+    words = re.findall(r'\b\w+\b', ' '.join(p['title'] for p in posts).lower())
+    stop_words = set(['من', 'عن', 'في', 'و', 'أو', 'إلى', 'هو', 'هي', 'هذا', 'هذه', 'جدا', 'تم', 'علي', 'مع', 'بعد', 'أن'])
+    word_counts = Counter([word for word in words if word not in stop_words and not word.isdigit()])
+    return {
+        'most_viewed': sorted(posts, key=lambda p: p['views'], reverse=True)[0],
+        'most_liked': sorted(posts, key=lambda p: p['likes'], reverse=True)[0],
+        'most_loved': sorted(sentiments, key=lambda s: s['sentiment'], reverse=True)[0],
+        'most_hated': sorted(sentiments, key=lambda s: s['sentiment'])[0],
+        'top_keywords': word_counts.most_common(5),
+    }
+
+def bench_analyze(sizes: List[int], repeat: int) -> None:
+    import analyzer
+    import sentiment
+
+    stub = _StubScorer()
+    sentiment.set_analyzer(sentiment.SentimentAnalyzer(scorer=stub))
+    for size in sizes:
+        posts = _synthetic_posts(size)
+        titles = [post['title'] for post in posts]
+        print(f"{size:,} posts")
+        baseline = _report('baseline (sorted()[0])', _timeit(lambda: _baseline_analyze_trends(posts, lambda t: stub.score_batch([t])[0]), repeat))
+        current = _report('analyze_trends', _timeit(lambda: analyzer.analyze_trends(posts), repeat))
+        # تفصيل زمن analyze_trends: المشاعر (مع التوحيد والذاكرة) وتقطيع الكلمات، ثم القيم القصوى
+        _report('  score_titles', _timeit(lambda: sentiment.score_titles(titles), repeat))
+        _report('  count_keywords', _timeit(lambda: analyzer.count_keywords(titles), repeat))
+        sorted_top = _report('  4x sorted()[0]', _timeit(lambda: [sorted(posts, key=lambda p: p[k], reverse=True)[0] for k in ('views', 'likes', 'views', 'likes')], repeat))
+        max_top = _report('  4x max/min', _timeit(lambda: [max(posts, key=lambda p: p[k]) for k in ('views', 'likes', 'views', 'likes')], repeat))
+        print(f"  speedup: x{baseline / current:.1f} (الكل)  x{sorted_top / max_top:.1f} (القيم القصوى)")
+
+# --- تحليل المشاعر ---
+
+def bench_sentiment(count: int, unique: int) -> None:
+    from sentiment import LexiconScorer, SentimentAnalyzer, SentimentCache, TextBlobScorer
+
+    titles = [post['title'] for post in _synthetic_posts(unique)]
+    titles = [titles[i % unique] for i in range(count)]
+    print(f"{count:,} titles ({unique:,} unique)")
+
+    def throughput(label: str, fn: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<28} {count / elapsed:14,.0f} titles/s")
+
+    for scorer in (TextBlobScorer(), LexiconScorer()):
+        throughput(f'{scorer.name} (no cache)', lambda: scorer.score_batch(titles))
+        cached = SentimentAnalyzer(scorer=scorer, cache=SentimentCache(max_size=unique))
+        throughput(f'{scorer.name} (cold cache)', lambda: cached.score_titles(titles))
+        throughput(f'{scorer.name} (warm cache)', lambda: cached.score_titles(titles))
+
+# --- التحليل التزايدي ---
+
+def _mutate_snapshot(posts: List['Post'], rng: Any, churn: float) -> List['Post']:
+    """لقطة تالية واقعية: تتغير المشاهدات، وتدخل وتخرج بعض المنشورات، وقد يتغير الترتيب."""
+    next_posts: List['Post'] = []
+    for post in posts:
+        if rng.random() < churn:
+            continue
+        updated = dict(post)
+        updated['views'] += rng.randrange(0, 5_000)
+        if rng.random() < 0.01:
+            updated['title'] = ' '.join(rng.choices(_WORDS, k=rng.randrange(1, 7)))
+        next_posts.append(updated)  # type: ignore [arg-type]
+    for _ in range(int(len(posts) * churn)):
+        next_posts.append(_synthetic_posts(1, seed=rng.randrange(1 << 30))[0] | {'url': f'https://youtube.com/watch?v=n{rng.randrange(1 << 30)}'})
+    if rng.random() < 0.3:
+        rng.shuffle(next_posts)
+    return next_posts
+
+def bench_incremental(size: int, rounds: int, churn: float, check_rounds: int) -> None:
+    import random
+
+    import analyzer
+    import sentiment
+    from incremental import IncrementalAnalyzer
+
+    sentiment.set_analyzer(sentiment.SentimentAnalyzer(scorer=_StubScorer()))
+
+    # فحص خاصية التطابق: لقطات عشوائية صغيرة (مع تكرار الروابط والقيم) مقابل التحليل الكامل
+    rng = random.Random(1)
+    for trial in range(check_rounds):
+        incremental = IncrementalAnalyzer()
+        posts = _synthetic_posts(rng.randrange(0, 30), seed=trial)
+        for post in posts:
+            post['views'] = rng.randrange(5)
+            post['url'] = f'u{rng.randrange(20)}'
+        for _ in range(10):
+            expected = analyzer.analyze_trends(posts)
+            got = incremental.update(posts)
+            assert got == expected, (trial, got, expected)
+            posts = _mutate_snapshot(posts, rng, churn=0.2)
+    print(f"تطابق التحليل التزايدي مع الكامل في {check_rounds * 10} لقطة عشوائية.")
+
+    rng = random.Random(2)
+    posts = _synthetic_posts(size)
+    snapshots = [posts]
+    for _ in range(rounds):
+        snapshots.append(_mutate_snapshot(snapshots[-1], rng, churn))
+    incremental = IncrementalAnalyzer()
+    incremental.update(snapshots[0])
+    print(f"{size:,} posts, {rounds} refreshes, churn={churn:.0%}")
+    full = _report('analyze_trends', _timeit(lambda: [analyzer.analyze_trends(s) for s in snapshots[1:]], 1))
+    inc = _report('IncrementalAnalyzer.update', _timeit(lambda: [incremental.update(s) for s in snapshots[1:]], 1))
+    print(f"  speedup: x{full / inc:.1f}")
+
+# --- تمثيل المنشورات المضغوط ---
+
+def _retained_bytes(build: Callable[[], Any]) -> Any:
+    """يبني الكائن تحت tracemalloc ويعيده مع حجم الذاكرة التي بقيت محجوزة بعد البناء."""
+    import gc
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = build()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return obj, current
+
+def bench_postpack(count: int) -> None:
+    import analyzer
+    import sentiment
+    from postpack import PostPack
+
+    sentiment.set_analyzer(sentiment.SentimentAnalyzer(scorer=_StubScorer()))
+    print(f"{count:,} posts")
+    dicts, dict_bytes = _retained_bytes(lambda: _synthetic_posts(count))
+    pack, pack_bytes = _retained_bytes(lambda: PostPack.from_posts(_synthetic_posts(count)))
+    print(f"  {'list[dict]':<28} {dict_bytes / 2**20:9.1f} MiB")
+    print(f"  {'PostPack':<28} {pack_bytes / 2**20:9.1f} MiB  (x{dict_bytes / pack_bytes:.1f} أصغر)")
+
+    for i in range(0, count, max(1, count // 1000)):
+        assert pack[i] == dicts[i] and pack[i].to_post() == dicts[i], i
+    assert analyzer.analyze_trends(pack) == analyzer.analyze_trends(dicts)  # type: ignore [arg-type]
+    print("تطابق محتوى PostPack ونتيجة التحليل مع القواميس.")
+
+    _report('PostPack.from_posts', _timeit(lambda: PostPack.from_posts(dicts), 1))
+    _report('analyze_trends(list[dict])', _timeit(lambda: analyzer.analyze_trends(dicts), 3))
+    _report('analyze_trends(PostPack)', _timeit(lambda: analyzer.analyze_trends(pack), 3))  # type: ignore [arg-type]
+
+# --- الكلمات المفتاحية التقريبية ---
+
+def bench_keywords(count: int, capacity: int, vocabulary: int) -> None:
+    import random
+    from collections import Counter
+
+    from keywords import SpaceSaving, Tokenizer
+
+    tokenizer = Tokenizer()
+    variants = ['مدرسة', 'مَدْرَسَة', 'مدرسه', 'إعلان', 'اعلان', 'أعلان', 'مستشفى', 'مستشفي']
+    normalized = tokenizer.count(variants)
+    assert normalized == Counter({'مدرسه': 3, 'اعلان': 3, 'مستشفي': 2}), normalized
+    print("توحيد الكتابة العربية: تُحسب الأشكال المختلفة للكلمة كلمة واحدة.")
+
+    # تدفق بتوزيع Zipf: قلة من الكلمات متكررة جداً وذيل طويل نادر
+    rng = random.Random(3)
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    stream = [f'w{i}' for i in rng.choices(range(vocabulary), weights=weights, k=count)]
+    exact = Counter(stream)
+    half = len(stream) // 2
+
+    def sketch_of(words: Sequence[str]) -> SpaceSaving:
+        sketch = SpaceSaving(capacity)
+        for word in words:
+            sketch.update(word)
+        return sketch
+
+    timings = _timeit(lambda: sketch_of(stream), 1)
+    whole = sketch_of(stream)
+    merged = sketch_of(stream[:half]).merge(sketch_of(stream[half:]))
+    print(f"{count:,} words, {len(exact):,} distinct, capacity={capacity}")
+    print(f"  {'SpaceSaving.update':<28} {count / timings[0]:14,.0f} words/s")
+    for label, sketch in (('single', whole), ('merged halves', merged)):
+        assert len(sketch) <= capacity
+        threshold = count / capacity
+        # ضمان Space-Saving: كل كلمة تكرارها أكبر من N/capacity موجودة، وتقديرها لا يقل عن الحقيقي
+        for word, true_count in exact.items():
+            if true_count > threshold:
+                assert word in sketch._counts, (label, word)
+            if word in sketch._counts:
+                assert sketch._counts[word] >= true_count
+        top = [word for word, _ in sketch.top(10)]
+        recall = len(set(top) & {word for word, _ in exact.most_common(10)}) / 10
+        print(f"  {label:<28} top-10 recall={recall:.0%}  max error={max(sketch.error(w) for w in top)}")
+
+# --- تحويل نصوص الأعداد ---
+
+def _legacy_parse_views(views_text: str) -> int:
+    """المسار القديم لتحويل نص المشاهدات (قبل numparse)."""
+    if not views_text:
+        return 0
+    cleaned_text = views_text.lower().replace('مشاهدة', '').replace('views', '').replace(',', '').strip()
+    value_text = ''.join(filter(lambda x: x.isdigit() or x == '.', cleaned_text))
+    if not value_text:
+        return 0
+    value = float(value_text)
+    if 'k' in cleaned_text or 'ألف' in cleaned_text:
+        return int(value * 1000)
+    if 'm' in cleaned_text or 'مليون' in cleaned_text:
+        return int(value * 1000000)
+    return int(value)
+
+_NUMPARSE_CASES: List[tuple] = [
+    (None, 0), ('', 0), ('No views', 0), ('لا توجد مشاهدات', 0),
+    ('0 views', 0), ('7 views', 7), ('1,234 views', 1234), ('12,345,678 views', 12_345_678),
+    ('1.2K views', 1200), ('1.2k views', 1200), ('15K views', 15_000), ('999K', 999_000),
+    ('1.2M views', 1_200_000), ('3M views', 3_000_000), ('2.5B views', 2_500_000_000), ('1B', 1_000_000_000),
+    ('200K+', 200_000), ('2,000+', 2000), ('50+', 50), ('1M+', 1_000_000),
+    ('1.2M مشاهدة', 1_200_000), ('مشاهدة 1.2M', 1_200_000),
+    ('1.5 مليون مشاهدة', 1_500_000), ('3 ملايين مشاهدة', 3_000_000), ('2 مليار', 2_000_000_000),
+    ('4 مليارات', 4_000_000_000), ('25 ألف مشاهدة', 25_000), ('25 الف مشاهدة', 25_000), ('3 آلاف', 3000),
+    ('٢٥ ألف مشاهدة', 25_000), ('١٫٥ مليون مشاهدة', 1_500_000), ('١٬٢٣٤ مشاهدة', 1234),
+    ('۱۲۳ بازدید', 123), ('١٢٣٤٥٦ مشاهدة', 123_456),
+    ('12 minutes ago', 12), ('5 months', 5), ('1,234 views • 2 days ago', 1234),
+    ('1.2 M views', 1_200_000), ('3.4m', 3_400_000),
+]
+
+def bench_numparse(repeat: int) -> None:
+    from numparse import parse_count
+
+    failures = [(text, expected, parse_count(text)) for text, expected in _NUMPARSE_CASES if parse_count(text) != expected]
+    for text, expected, got in failures:
+        print(f"  فشل: {text!r} -> {got} (المتوقع {expected})")
+    if failures:
+        raise SystemExit(f"{len(failures)} حالة فاشلة من {len(_NUMPARSE_CASES)}")
+    legacy_wrong = sum(1 for text, expected in _NUMPARSE_CASES if _legacy_parse_views(text or '') != expected)
+    print(f"نجحت كل الحالات ({len(_NUMPARSE_CASES)}). المسار القديم يخطئ في {legacy_wrong} منها.")
+
+    # نصوص واقعية: مجموعة محدودة تتكرر كثيراً (كما بين تحديثات صفحة التريند)
+    texts = [f'{i * 1237 % 999_999:,} views' for i in range(500)] + [f'{i / 10:.1f}M views' for i in range(500)]
+    stream = texts * 100
+    print(f"{len(stream):,} strings ({len(texts)} unique)")
+    legacy = _report('legacy _parse_youtube_views', _timeit(lambda: [_legacy_parse_views(t) for t in stream], repeat))
+    parse_count.cache_clear()
+    cold = _report('parse_count (cold cache)', _timeit(lambda: [parse_count.__wrapped__(t) for t in stream], repeat))
+    warm = _report('parse_count (LRU)', _timeit(lambda: [parse_count(t) for t in stream], repeat))
+    print(f"  speedup: x{legacy / cold:.1f} (بدون ذاكرة)  x{legacy / warm:.1f} (مع ذاكرة)")
+
+# --- استخلاص نص المقالات ---
+
+def _legacy_article_text(html: str, max_chars: int) -> str:
+    """المسار القديم: شجرة BeautifulSoup كاملة لكل الصفحة ثم دمج كل الفقرات وقص أول max_chars."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'lxml')
+    return ' '.join([p.get_text() for p in soup.find_all('p')])[:max_chars]
+
+def _synthetic_news_page(paragraphs: int) -> bytes:
+    """صفحة خبر اصطناعية بشكل الصفحات الحقيقية: سكربتات وأنماط ضخمة، ثم المقال، ثم التعليقات والتذييل."""
+    script = '<script>window.__STATE__ = {"ads": [' + ','.join(f'{{"slot": {i}, "w": 300}}' for i in range(3000)) + ']};</script>\n'
+    style = '<style>' + ''.join(f'.c{i} {{ margin: {i % 9}px; color: #{i % 4096:03x}; }}' for i in range(3000)) + '</style>\n'
+    nav = '<nav><ul>' + ''.join(f'<li><a href="/s/{i}">قسم {i}</a></li>' for i in range(60)) + '</ul></nav>'
+    body = ''.join(
+        f'<p>الفقرة {i}: نص <b>تجريبي</b> عن <a href="/t/{i}">الخبر</a> &amp; تفاصيله، '
+        f'يكفي طوله لقياس زمن الاستخلاص بشكل واقعي. The story continues here.</p>\n'
+        for i in range(paragraphs)
+    )
+    comments = ''.join(f'<div class="comment"><p>تعليق رقم {i} على الخبر</p><span>منذ {i} دقيقة</span></div>' for i in range(300))
+    page = (
+        '<!DOCTYPE html><html lang="ar"><head><meta charset="utf-8"><title>خبر</title>' + style + script * 2
+        + '</head><body><header>' + nav + '</header><main><article><h1>عنوان الخبر</h1>'
+        + '<p>مقدمة الخبر<p>فقرة بلا وسم إغلاق<div>إعلان</div>'
+        + body + '</article><section class="comments">' + comments + '</section></main>'
+        + '<footer><p>جميع الحقوق محفوظة</p></footer>' + script * 3 + '</body></html>'
+    )
+    return page.encode('utf-8')
+
+def bench_article(paths: List[str], repeat: int, chunk_size: int, paragraphs: int) -> None:
+    from article_extract import ArticleExtractor
+    from summarizer import MAX_ARTICLE_CHARS
+
+    pages: Dict[str, bytes] = {}
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'rb') as f:
+                pages[path] = f.read()
+    if not pages:
+        print(f"لم يتم العثور على مقالات محفوظة، سيتم استخدام صفحة اصطناعية بـ {paragraphs} فقرة.")
+        pages['<synthetic>'] = _synthetic_news_page(paragraphs)
+
+    def streaming(body: bytes) -> ArticleExtractor:
+        extractor = ArticleExtractor(MAX_ARTICLE_CHARS)
+        for start in range(0, len(body), chunk_size):
+            if extractor.feed(body[start:start + chunk_size]):
+                break
+        return extractor
+
+    total_read = total_size = 0
+    for name, body in pages.items():
+        html = body.decode('utf-8', errors='replace')
+        extractor = streaming(body)
+        total_read += extractor.bytes_read
+        total_size += len(body)
+        print(f"{name} ({len(body) / 1024:.0f} KiB, قُرئ منها {extractor.bytes_read / 1024:.0f} KiB"
+              f" = {extractor.bytes_read / len(body):.0%})")
+        if _legacy_article_text(html, MAX_ARTICLE_CHARS) != extractor.text():
+            print("  تحذير: النص المستخلص يختلف عن المسار القديم!")
+        legacy = _report('legacy (BeautifulSoup lxml)', _timeit(lambda: _legacy_article_text(html, MAX_ARTICLE_CHARS), repeat))
+        fast = _report('streaming ArticleExtractor', _timeit(lambda: streaming(body), repeat))
+        print(f"  speedup: x{legacy / fast:.1f}")
+    if len(pages) > 1:
+        print(f"المجموع: قُرئ {total_read / 1024:.0f} KiB من {total_size / 1024:.0f} KiB ({total_read / total_size:.0%})")
+
+# --- ذاكرة ردود HTTP ---
+
+def _local_http_server(body: bytes) -> Any:
+    """خادم HTTP محلي بديل للمصادر الحقيقية: /page بـ ETag ويرد 304 عند تطابقه، و/no-store لا يُحفظ."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    etag = '"v1"'
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            server.requests.append((self.path, self.headers.get('If-None-Match')))
+            if self.path == '/page' and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if self.path == '/page':
+                self.send_header('ETag', etag)
+            else:
+                self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def bench_httpcache(size: int, repeat: int) -> None:
+    from httpcache import HttpClient
+
+    body = ('<p>' + 'x' * 60 + '</p>\n').encode() * max(1, size // 68)
+    server = _local_http_server(body)
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    failures: List[str] = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    try:
+        client = HttpClient(default_ttl=60, host_ttls={})
+        first = client.get(f'{base}/page')
+        second = client.get(f'{base}/page')
+        stats = client.stats()
+        check(first.content == body and second.content == body, "الرد المحفوظ يطابق جسم الصفحة")
+        check(stats['misses'] == 1 and stats['hits'] == 1, f"طلب فعلي ثم إصابة من الذاكرة ({stats['misses']} miss, {stats['hits']} hit)")
+        check(len(server.requests) == 1, f"الخادم استقبل طلباً واحداً فقط ({len(server.requests)})")
+        check(stats['bytes_saved'] == len(body), f"bytes_saved={stats['bytes_saved']} بعد الإصابة")
+
+        # صلاحية صفرية: كل طلب تالٍ يُعاد التحقق منه بطلب شرطي يرد عليه الخادم بـ 304
+        server.requests.clear()
+        client = HttpClient(default_ttl=0, host_ttls={})
+        client.get(f'{base}/page')
+        revalidated = client.get(f'{base}/page')
+        stats = client.stats()
+        check(server.requests[-1] == ('/page', '"v1"'), f"أُرسلت If-None-Match مع الطلب الثاني ({server.requests[-1][1]})")
+        check(revalidated.status_code == 200 and revalidated.content == body, "رد 304 يعيد الجسم المحفوظ")
+        check(stats['revalidated'] == 1, f"revalidated={stats['revalidated']}")
+        check(stats['bytes_saved'] == len(body), f"bytes_saved={stats['bytes_saved']} بعد 304")
+        check(stats['bytes_downloaded'] == len(body), f"bytes_downloaded={stats['bytes_downloaded']} (الجسم نُزّل مرة واحدة)")
+
+        server.requests.clear()
+        client.get(f'{base}/no-store')
+        client.get(f'{base}/no-store')
+        check(len(server.requests) == 2 and all(etag is None for _, etag in server.requests),
+              "ردود no-store لا تُحفظ ولا تُرسل معها طلبات شرطية")
+
+        print(f"{len(body) / 1024:.0f} KiB عبر خادم محلي")
+        cached = HttpClient(default_ttl=60, host_ttls={})
+        revalidating = HttpClient(default_ttl=0, host_ttls={})
+        uncached = _report('بدون ذاكرة (use_cache=False)', _timeit(lambda: cached.get(f'{base}/page', use_cache=False), repeat))
+        conditional = _report('طلب شرطي (304)', _timeit(lambda: revalidating.get(f'{base}/page'), repeat))
+        hit = _report('إصابة من الذاكرة', _timeit(lambda: cached.get(f'{base}/page'), repeat))
+        print(f"  speedup: x{uncached / conditional:.1f} (304)  x{uncached / hit:.0f} (إصابة)")
+    finally:
+        server.shutdown()
+        server.server_close()
+    if failures:
+        raise SystemExit(f"{len(failures)} فحص فاشل لذاكرة ردود HTTP")
+
+# --- زمن بدء التشغيل ---
+
+# ميزانية زمن الاستيراد (بالمللي ثانية) لكل نقطة دخول، والمكتبات الثقيلة التي يجب ألا تُستورد عند البدء
+IMPORT_BUDGETS_MS = {'app': 400, 'main': 300, 'worker': 300}
+LAZY_MODULES = ('google.generativeai', 'bs4', 'lxml', 'textblob', 'numpy')
+
+def _import_time_ms(module: str) -> float:
+    """الزمن التراكمي لاستيراد الوحدة في عملية جديدة، كما يقيسه python -X importtime."""
+    import subprocess
+    import sys
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"لم يظهر {module} في مخرجات importtime")
+
+def bench_importtime(modules: List[str], repeat: int, budgets: Dict[str, float]) -> None:
+    import subprocess
+    import sys
+
+    failures: List[str] = []
+    for module in modules:
+        elapsed = min(_import_time_ms(module) for _ in range(repeat))
+        budget = budgets.get(module)
+        check = subprocess.run(
+            [sys.executable, '-c', f'import sys, {module}; print("loaded:", *(m for m in {LAZY_MODULES!r} if m in sys.modules))'],
+            capture_output=True, text=True, check=True,
+        )
+        eager = [line.split()[1:] for line in check.stdout.splitlines() if line.startswith('loaded:')][-1]
+        status = 'ok' if (budget is None or elapsed <= budget) and not eager else 'FAIL'
+        print(f"  {module:<12} {elapsed:8.1f}ms  budget={budget or '-'}ms  {status}")
+        if budget is not None and elapsed > budget:
+            failures.append(f"{module}: {elapsed:.0f}ms > {budget:.0f}ms")
+        if eager:
+            failures.append(f"{module}: استورد مكتبات ثقيلة عند البدء ({', '.join(eager)})")
+    if failures:
+        raise SystemExit("تجاوز ميزانية بدء التشغيل:\n" + '\n'.join(failures))
+
+# --- تشغيل سريع لكل القياسات ---
+
+# أوامر القياس بأصغر المدخلات: تكشف القياسات المعطلة (استثناء أو فحص فاشل) دون قياس فعلي
+SMOKE_RUNS: List[List[str]] = [
+    ['yt-extract', '--repeat', '1', '--synthetic', '5'],
+    ['numparse', '--repeat', '1'],
+    ['article', '--repeat', '1', '--paragraphs', '5'],
+    ['httpcache', '--repeat', '1', '--size', '4096'],
+]
+
+def bench_smoke() -> None:
+    import subprocess
+    import sys
+
+    failures: List[str] = []
+    for args in SMOKE_RUNS:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), *args], capture_output=True, text=True)
+        status = 'ok' if result.returncode == 0 else 'FAIL'
+        print(f"  {' '.join(args):<48} {status}")
+        if result.returncode != 0:
+            failures.append(f"{' '.join(args)}:\n{(result.stderr or result.stdout).strip()[-2000:]}")
+    if failures:
+        raise SystemExit("فشل التشغيل السريع:\n" + '\n'.join(failures))
+
+# --- إعادة تشغيل الردود المسجلة ---
+
+class ScenarioResult(TypedDict):
+    throughput: float
+    p50_ms: float
+    p99_ms: float
+    peak_kib: float
+
+# المقاييس التي تُعد زيادتها تراجعاً في الأداء (ونقصانها في حالة الإنتاجية)
+_HIGHER_IS_WORSE = ('p50_ms', 'p99_ms', 'peak_kib')
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """النسبة المئوية بطريقة أقرب رتبة."""
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def _synthetic_rss(items: int) -> bytes:
+    entries = ''.join(
+        f'<item><title>ترند تجريبي {i}</title><ht:approx_traffic>{(i + 1) * 10},000+</ht:approx_traffic>'
+        f'<link>https://news.example/article/{i}</link><pubDate>Mon, 01 Jan 2024 00:00:00 +0000</pubDate>'
+        f'<ht:picture url="https://news.example/{i}.jpg"/></item>'
+        for i in range(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss xmlns:ht="https://trends.google.com/trends/approx_traffic" version="2.0"><channel>'
+        + entries + '</channel></rss>'
+    ).encode('utf-8')
+
+def _synthetic_article(url: str) -> bytes:
+    paragraphs = ''.join(f'<p>فقرة {i} من المقال {url}. هذا نص تجريبي لقياس زمن التلخيص.</p>' for i in range(40))
+    return f'<html><body><nav>قائمة</nav>{paragraphs}</body></html>'.encode('utf-8')
+
+def _record_synthetic(directory: str, videos: int) -> None:
+    """
+    يسجل ردوداً اصطناعية عبر نفس مسار التسجيل الحقيقي، بتوجيه جلسة HTTP إلى محول محلي
+    ونموذج FakeModel، حتى يمكن تشغيل المقارنة على جهاز بلا شبكة ولا مفتاح Gemini.
+    """
+    import requests
+    from requests.adapters import BaseAdapter
+
+    import httpcache
+    import replay
+    from scraper import fetch_all_trends
+    from summarizer import FakeModel
+
+    class SyntheticUpstream(BaseAdapter):
+        def send(self, request: Any, **kwargs: Any) -> Any:
+            url = request.url or ''
+            if 'youtube.com' in url:
+                body = _synthetic_trending_page(videos)
+            elif 'trends.google.com' in url:
+                body = _synthetic_rss(20)
+            else:
+                body = _synthetic_article(url)
+            response = requests.Response()
+            response.status_code = 200
+            response.url = url
+            response.request = request
+            response.encoding = 'utf-8'
+            response.headers['Content-Type'] = 'text/html; charset=utf-8'
+            response._content = body
+            return response
+
+        def close(self) -> None:
+            pass
+
+    replay.install_recording(directory, model=FakeModel())
+    session = httpcache.get_client().session
+    session.mount('http://', SyntheticUpstream())
+    session.mount('https://', SyntheticUpstream())
+    with contextlib.redirect_stdout(io.StringIO()):
+        posts = fetch_all_trends()
+    print(f"تم تسجيل ردود اصطناعية ({len(posts)} منشوراً) في {directory}")
+
+def _run_scenario(fn: Callable[[], Any], iterations: int, warmup: int) -> ScenarioResult:
+    """يقيس الزمن دون tracemalloc (لأنه يبطئ التنفيذ)، ثم يقيس ذروة الذاكرة في تنفيذ منفصل."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            fn()
+        start = time.perf_counter()
+        timings = _timeit(fn, iterations)
+        total = time.perf_counter() - start
+
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'throughput': iterations / total,
+        'p50_ms': _percentile(timings, 50) * 1000,
+        'p99_ms': _percentile(timings, 99) * 1000,
+        'peak_kib': peak / 1024,
+    }
+
+def _compare(name: str, result: ScenarioResult, baseline: Optional[ScenarioResult], tolerance: float) -> bool:
+    """يطبع النتيجة مقارنة بخط الأساس ويعيد False عند تراجع يتجاوز النسبة المسموحة."""
+    print(f"  {name:<18} {result['throughput']:9.1f}/s  p50={result['p50_ms']:8.2f}ms  "
+          f"p99={result['p99_ms']:8.2f}ms  peak={result['peak_kib']:9.0f}KiB")
+    if baseline is None:
+        return True
+    ok = True
+    for metric in ('throughput',) + _HIGHER_IS_WORSE:
+        old, new = baseline[metric], result[metric]  # type: ignore [literal-required]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = change > tolerance if metric in _HIGHER_IS_WORSE else -change > tolerance
+        if worse:
+            ok = False
+        print(f"    {metric:<10} {old:10.2f} -> {new:10.2f} ({change:+.1%}){'  <-- تراجع' if worse else ''}")
+    return ok
+
+def bench_replay(directory: str, iterations: int, warmup: int, baseline_path: Optional[str],
+                 update_baseline: bool, tolerance: float, synthesize: bool, videos: int) -> None:
+    import replay
+    import summarizer
+
+    if synthesize or not os.path.isdir(os.path.join(directory, 'http')):
+        _record_synthetic(directory, videos)
+
+    replay.install_replay(directory)
+    # ذاكرة ملخصات مؤقتة حتى لا تتأثر النتائج بملخصات محفوظة من تشغيل سابق
+    summary_dir = tempfile.TemporaryDirectory()
+    summarizer.set_cache(summarizer.SummaryCache(os.path.join(summary_dir.name, 'summaries.sqlite3')))
+
+    import analyzer
+    import app as webapp
+    import scraper
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        posts = scraper.fetch_all_trends()
+        # لا نريد خيط التحديث الخلفي أثناء القياس: نوقفه قبل أن يبدأ وننشر لقطة واحدة يدوياً
+        webapp.scheduler.stop()
+        webapp.scheduler.refresh()
+    if not posts or webapp.scheduler.latest() is None:
+        raise SystemExit(f"لم تُنتج التسجيلات في {directory} أي منشورات.")
+    client = webapp.app.test_client()
+
+    scenarios: Dict[str, Callable[[], Any]] = {
+        'fetch_all_trends': scraper.fetch_all_trends,
+        'analyze_trends': lambda: analyzer.analyze_trends(posts),
+        'home': lambda: client.get('/').get_data(),
+    }
+
+    baseline: Dict[str, ScenarioResult] = {}
+    baseline_path = baseline_path or os.path.join(directory, 'baseline.json')
+    if os.path.exists(baseline_path) and not update_baseline:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"{len(posts)} posts from {directory}, {iterations} iterations")
+    results: Dict[str, ScenarioResult] = {}
+    ok = True
+    for name, fn in scenarios.items():
+        results[name] = _run_scenario(fn, iterations, warmup)
+        ok = _compare(name, results[name], baseline.get(name), tolerance) and ok
+    summary_dir.cleanup()
+
+    if update_baseline or not baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"تم حفظ خط الأساس في {baseline_path}")
+    elif not ok:
+        raise SystemExit(f"تراجع في الأداء يتجاوز {tolerance:.0%} مقارنة بخط الأساس.")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="قياس أداء مكونات تطبيق التريندات")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    yt = commands.add_parser('yt-extract', help="مقارنة استخراج ytInitialData مع مسار BeautifulSoup")
+    yt.add_argument('paths', nargs='*', default=['fixtures/youtube/*.html'])
+    yt.add_argument('--repeat', type=int, default=5)
+    yt.add_argument('--synthetic', type=int, default=200, help="عدد الفيديوهات في الصفحة الاصطناعية")
+
+    analyze = commands.add_parser('analyze', help="مقارنة analyze_trends مع نسختها الأصلية (أربع عمليات فرز كاملة)")
+    analyze.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    analyze.add_argument('--repeat', type=int, default=3)
+
+    sent = commands.add_parser('sentiment', help="عدد العناوين في الثانية لكل محلل مشاعر")
+    sent.add_argument('--count', type=int, default=20_000)
+    sent.add_argument('--unique', type=int, default=2_000, help="عدد العناوين المختلفة (الباقي تكرار)")
+
+    inc = commands.add_parser('incremental', help="فحص تطابق التحليل التزايدي وقياس سرعته")
+    inc.add_argument('--size', type=int, default=50_000)
+    inc.add_argument('--rounds', type=int, default=10)
+    inc.add_argument('--churn', type=float, default=0.02, help="نسبة المنشورات المتغيرة في كل تحديث")
+    inc.add_argument('--check-rounds', type=int, default=300)
+
+    pack = commands.add_parser('postpack', help="مقارنة ذاكرة PostPack مع قائمة القواميس")
+    pack.add_argument('--count', type=int, default=1_000_000)
+
+    kw = commands.add_parser('keywords', help="فحص توحيد الكلمات ودقة ملخص Space-Saving ودمجه")
+    kw.add_argument('--count', type=int, default=1_000_000)
+    kw.add_argument('--capacity', type=int, default=2000)
+    kw.add_argument('--vocabulary', type=int, default=200_000)
+
+    num = commands.add_parser('numparse', help="فحص جدول حالات تحويل نصوص الأعداد وقياس سرعته")
+    num.add_argument('--repeat', type=int, default=5)
+
+    art = commands.add_parser('article', help="مقارنة استخلاص نص المقالات التزايدي مع مسار BeautifulSoup")
+    art.add_argument('paths', nargs='*', help="ملفات HTML لمقالات محفوظة (تدعم أنماط glob)")
+    art.add_argument('--repeat', type=int, default=20)
+    art.add_argument('--chunk-size', type=int, default=16384)
+    art.add_argument('--paragraphs', type=int, default=80, help="عدد فقرات المقال الاصطناعي")
+
+    http = commands.add_parser('httpcache', help="فحص ذاكرة ردود HTTP والطلبات الشرطية أمام خادم محلي")
+    http.add_argument('--size', type=int, default=256 * 1024, help="حجم جسم الصفحة بالبايت")
+    http.add_argument('--repeat', type=int, default=50)
+
+    imp = commands.add_parser('importtime', help="فحص ميزانية زمن الاستيراد وعدم تحميل المكتبات الثقيلة عند البدء")
+    imp.add_argument('modules', nargs='*', default=list(IMPORT_BUDGETS_MS))
+    imp.add_argument('--repeat', type=int, default=3, help="يؤخذ أقل زمن من عدة عمليات")
+    imp.add_argument('--budget', action='append', default=[], metavar='MODULE=MS', help="تعديل ميزانية وحدة")
+
+    commands.add_parser('smoke', help="تشغيل سريع لأوامر القياس بمدخلات صغيرة للتأكد من أنها لا تفشل")
+
+    rep = commands.add_parser('replay', help="تشغيل الردود المسجلة عبر الجلب والتحليل والصفحة الرئيسية ومقارنتها بخط الأساس")
+    rep.add_argument('directory', nargs='?', default='fixtures/replay')
+    rep.add_argument('--iterations', type=int, default=50)
+    rep.add_argument('--warmup', type=int, default=2)
+    rep.add_argument('--baseline', help="ملف خط الأساس (افتراضياً baseline.json داخل مجلد التسجيلات)")
+    rep.add_argument('--update-baseline', action='store_true')
+    rep.add_argument('--tolerance', type=float, default=0.2, help="نسبة التراجع المسموحة قبل الفشل")
+    rep.add_argument('--synthesize', action='store_true', help="تسجيل ردود اصطناعية بدلاً من ردود حقيقية")
+    rep.add_argument('--videos', type=int, default=200, help="عدد الفيديوهات في الصفحة الاصطناعية")
+
+    args = parser.parse_args()
+    if args.command == 'yt-extract':
+        bench_yt_extract(args.paths, args.repeat, args.synthetic)
+    elif args.command == 'analyze':
+        bench_analyze(args.sizes, args.repeat)
+    elif args.command == 'sentiment':
+        bench_sentiment(args.count, args.unique)
+    elif args.command == 'incremental':
+        bench_incremental(args.size, args.rounds, args.churn, args.check_rounds)
+    elif args.command == 'postpack':
+        bench_postpack(args.count)
+    elif args.command == 'keywords':
+        bench_keywords(args.count, args.capacity, args.vocabulary)
+    elif args.command == 'numparse':
+        bench_numparse(args.repeat)
+    elif args.command == 'article':
+        bench_article(args.paths, args.repeat, args.chunk_size, args.paragraphs)
+    elif args.command == 'httpcache':
+        bench_httpcache(args.size, args.repeat)
+    elif args.command == 'importtime':
+        budgets = dict(IMPORT_BUDGETS_MS)
+        for item in args.budget:
+            name, _, value = item.partition('=')
+            budgets[name] = float(value)
+        bench_importtime(args.modules, args.repeat, budgets)
+    elif args.command == 'smoke':
+        bench_smoke()
+    elif args.command == 'replay':
+        bench_replay(args.directory, args.iterations, args.warmup, args.baseline,
+                     args.update_baseline, args.tolerance, args.synthesize, args.videos)
+
+if __name__ == "__main__":
+    main()
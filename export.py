@@ -0,0 +1,247 @@
+"""
+تصدير اللقطات إلى ملفات عمودية (Parquet أو Arrow IPC) مقسمة حسب التاريخ والمنصة للتحليل اللاحق:
+    <root>/posts/date=2024-01-31/platform=YouTube/part-....parquet
+    <root>/analysis/date=2024-01-31/part-....parquet
+الملفات لا تُعدّل بعد كتابتها: كل دفعة تُكتب في ملف جديد، فالأقسام القديمة لا يعاد كتابتها أبداً.
+يتطلب مكتبة pyarrow. مثال للقراءة:
+    import export
+    table = export.load_posts('exports', since='2024-01-01', platform='YouTube')
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from refresher import Snapshot
+
+# مجلد التصدير (التصدير معطل إذا لم يُحدد)، وصيغة الملفات: parquet أو arrow
+EXPORT_PATH = os.getenv("TREND_EXPORT_PATH")
+EXPORT_FORMAT = os.getenv("TREND_EXPORT_FORMAT", "parquet")
+# عدد الصفوف المتراكمة في الذاكرة قبل كتابة ملف جديد لكل قسم
+EXPORT_BATCH_ROWS = int(os.getenv("TREND_EXPORT_BATCH_ROWS", "50000"))
+# أقصى مدة (بالثواني) تبقى فيها الصفوف في الذاكرة قبل كتابتها حتى لو لم تبلغ حجم الدفعة
+EXPORT_FLUSH_INTERVAL = float(os.getenv("TREND_EXPORT_FLUSH_INTERVAL", "3600"))
+
+_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("التصدير يتطلب مكتبة pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+def _schemas(pa: Any) -> Tuple[Any, Any]:
+    """مخطط ملفات المنشورات وملفات ملخص التحليل (أعمدة التقسيم date وplatform موجودة في المسار فقط)."""
+    timestamp = pa.timestamp('ms', tz='UTC')
+    keywords = pa.list_(pa.struct([('keyword', pa.string()), ('count', pa.int64())]))
+    posts = pa.schema([
+        ('taken_at', timestamp),
+        ('snapshot_version', pa.int64()),
+        ('title', pa.string()),
+        ('views', pa.int64()),
+        ('likes', pa.int64()),
+        ('url', pa.string()),
+        ('thumbnail', pa.string()),
+        ('channel', pa.string()),
+        ('published_time', pa.string()),
+        ('summary', pa.string()),
+        ('regions', pa.list_(pa.struct([('geo', pa.string()), ('rank', pa.int32()), ('traffic', pa.int64())]))),
+    ])
+    analysis = pa.schema([
+        ('taken_at', timestamp),
+        ('snapshot_version', pa.int64()),
+        ('posts', pa.int64()),
+        ('most_viewed_url', pa.string()),
+        ('most_viewed_title', pa.string()),
+        ('most_viewed_views', pa.int64()),
+        ('most_liked_url', pa.string()),
+        ('most_liked_likes', pa.int64()),
+        ('most_loved_url', pa.string()),
+        ('most_loved_sentiment', pa.float64()),
+        ('most_hated_url', pa.string()),
+        ('most_hated_sentiment', pa.float64()),
+        ('top_keywords', keywords),
+        ('window_keywords', keywords),
+        ('fastest_rising', pa.list_(pa.struct([
+            ('url', pa.string()), ('title', pa.string()), ('velocity', pa.float64()), ('anomaly', pa.bool_()),
+        ]))),
+    ])
+    return posts, analysis
+
+class SnapshotExporter:
+    """
+    يجمع صفوف اللقطات في الذاكرة كدفعات Arrow ويكتبها إلى ملفات جديدة عند بلوغ batch_rows
+    أو مرور flush_interval. يمكن تسجيله كمعالج بعد كل تحديث: scheduler.add_listener(exporter.add).
+    """
+
+    def __init__(self, root: str, fmt: str = EXPORT_FORMAT, batch_rows: int = EXPORT_BATCH_ROWS,
+                 flush_interval: float = EXPORT_FLUSH_INTERVAL) -> None:
+        if fmt not in _EXTENSIONS:
+            raise ValueError(f"صيغة تصدير غير معروفة: {fmt} (المتاح: {', '.join(_EXTENSIONS)})")
+        self._pa = _pyarrow()
+        self.root = root
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._posts_schema, self._analysis_schema = _schemas(self._pa)
+        self._lock = threading.Lock()
+        # الدفعات المنتظرة لكل قسم: (التاريخ، المنصة) للمنشورات، والتاريخ فقط للتحليل
+        self._posts: Dict[Tuple[str, str], List[Any]] = {}
+        self._analysis: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        self._sequence = 0
+
+    def add(self, snapshot: Snapshot) -> None:
+        """يضيف لقطة إلى الدفعة الحالية ويكتب الدفعة إذا حان وقتها."""
+        pa = self._pa
+        date = datetime.fromtimestamp(snapshot.created_at, timezone.utc).strftime('%Y-%m-%d')
+        pack = snapshot.posts
+        count = len(pack)
+
+        # الأعمدة الرقمية تُقرأ من مصفوفات PostPack مباشرة دون نسخ
+        views = pa.Array.from_buffers(pa.int64(), count, [None, pa.py_buffer(pack.views)])
+        likes = pa.Array.from_buffers(pa.int64(), count, [None, pa.py_buffer(pack.likes)])
+        platform_codes = pa.Array.from_buffers(pa.uint32(), count, [None, pa.py_buffer(pack.platform_codes)])
+        channel_codes = pa.Array.from_buffers(pa.uint32(), count, [None, pa.py_buffer(pack.channel_codes)])
+        batch = pa.RecordBatch.from_arrays([
+            pa.repeat(pa.scalar(int(snapshot.created_at * 1000), self._posts_schema.field('taken_at').type), count),
+            pa.repeat(pa.scalar(snapshot.version, pa.int64()), count),
+            pa.array(pack.titles, pa.string()),
+            views,
+            likes,
+            pa.array(pack.urls, pa.string()),
+            pa.array(pack.thumbnails, pa.string()),
+            pa.array(pack.channels.values, pa.string()).take(channel_codes),
+            pa.array(pack.published_times, pa.string()),
+            pa.array(pack.summaries, pa.string()),
+            pa.array([pack.regions.get(i) for i in range(count)], self._posts_schema.field('regions').type),
+        ], schema=self._posts_schema)
+
+        # منشورات المصادر المتعطلة مكررة من لقطة سابقة وليست قياسات جديدة، فلا تُصدّر
+        fresh = pa.array([i not in pack.stale for i in range(count)], pa.bool_()) if pack.stale else None
+
+        with self._lock:
+            for code, platform in enumerate(pack.platforms.values):
+                selected = pa.compute.equal(platform_codes, code)
+                if fresh is not None:
+                    selected = pa.compute.and_(selected, fresh)
+                rows = batch.filter(selected)
+                if rows.num_rows:
+                    self._posts.setdefault((date, platform), []).append(rows)
+            if snapshot.analysis is not None:
+                self._analysis.setdefault(date, []).append(self._analysis_row(snapshot, count))
+            self._pending_rows += count - len(pack.stale)
+            due = (self._pending_rows >= self.batch_rows
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def _analysis_row(self, snapshot: Snapshot, count: int) -> Dict[str, Any]:
+        analysis = snapshot.analysis
+        assert analysis is not None
+        return {
+            'taken_at': int(snapshot.created_at * 1000),
+            'snapshot_version': snapshot.version,
+            'posts': count,
+            'most_viewed_url': analysis['most_viewed']['url'],
+            'most_viewed_title': analysis['most_viewed']['title'],
+            'most_viewed_views': analysis['most_viewed']['views'],
+            'most_liked_url': analysis['most_liked']['url'],
+            'most_liked_likes': analysis['most_liked']['likes'],
+            'most_loved_url': analysis['most_loved']['post']['url'],
+            'most_loved_sentiment': analysis['most_loved']['sentiment'],
+            'most_hated_url': analysis['most_hated']['post']['url'],
+            'most_hated_sentiment': analysis['most_hated']['sentiment'],
+            'top_keywords': [{'keyword': k, 'count': c} for k, c in analysis['top_keywords']],
+            'window_keywords': [{'keyword': k, 'count': c} for k, c in analysis.get('window_keywords', [])],
+            'fastest_rising': [
+                {'url': item['post']['url'], 'title': item['post']['title'],
+                 'velocity': item['velocity'], 'anomaly': item['anomaly']}
+                for item in analysis.get('fastest_rising', [])
+            ],
+        }
+
+    def flush(self) -> int:
+        """يكتب كل الدفعات المنتظرة (ملف جديد لكل قسم) ويعيد عدد الملفات المكتوبة."""
+        pa = self._pa
+        with self._lock:
+            posts, self._posts = self._posts, {}
+            analysis, self._analysis = self._analysis, {}
+            self._pending_rows = 0
+            self._last_flush = time.monotonic()
+            self._sequence += 1
+            sequence = self._sequence
+
+        written = 0
+        for (date, platform), batches in posts.items():
+            directory = os.path.join(self.root, 'posts', f'date={date}', f'platform={quote(platform, safe="")}')
+            self._write(pa.Table.from_batches(batches, schema=self._posts_schema), directory, sequence)
+            written += 1
+        for date, rows in analysis.items():
+            directory = os.path.join(self.root, 'analysis', f'date={date}')
+            self._write(pa.Table.from_pylist(rows, schema=self._analysis_schema), directory, sequence)
+            written += 1
+        return written
+
+    def _write(self, table: Any, directory: str, sequence: int) -> None:
+        """يكتب الجدول في ملف مؤقت ثم يعيد تسميته، فالقارئ لا يرى ملفاً نصف مكتوب."""
+        os.makedirs(directory, exist_ok=True)
+        name = f'part-{time.strftime("%Y%m%dT%H%M%S", time.gmtime())}-{os.getpid()}-{sequence}.{_EXTENSIONS[self.fmt]}'
+        path = os.path.join(directory, name)
+        tmp_path = os.path.join(directory, f'.{name}.tmp')
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, tmp_path, compression='zstd')
+        else:
+            # ملفات Arrow IPC غير مضغوطة حتى يمكن قراءتها عبر memory map دون فك ضغط
+            with self._pa.OSFile(tmp_path, 'wb') as sink:
+                with self._pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def close(self) -> None:
+        self.flush()
+
+def _dataset(root: str, kind: str, fmt: str) -> Any:
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    _pyarrow()
+    return ds.dataset(
+        os.path.join(root, kind),
+        format='ipc' if fmt == 'arrow' else 'parquet',
+        partitioning='hive',
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+def load_posts(root: str, fmt: str = EXPORT_FORMAT, since: Optional[str] = None, until: Optional[str] = None,
+               platform: Optional[str] = None, columns: Optional[List[str]] = None) -> Any:
+    """
+    يقرأ المنشورات المصدّرة كجدول pyarrow، مع تجاوز الأقسام خارج المدى (التاريخ بصيغة YYYY-MM-DD).
+    ملفات arrow تُقرأ عبر memory map.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = _dataset(root, 'posts', fmt)
+    condition = None
+    for expression in (
+        ds.field('date') >= since if since else None,
+        ds.field('date') <= until if until else None,
+        ds.field('platform') == platform if platform else None,
+    ):
+        if expression is not None:
+            condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition)
+
+def load_analysis(root: str, fmt: str = EXPORT_FORMAT, since: Optional[str] = None) -> Any:
+    """يقرأ ملخصات التحليل المصدّرة (صف لكل لقطة)."""
+    import pyarrow.dataset as ds
+
+    dataset = _dataset(root, 'analysis', fmt)
+    return dataset.to_table(filter=ds.field('date') >= since if since else None)
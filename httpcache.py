@@ -0,0 +1,377 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Tuple, TypedDict, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# ضغط brotli متاح فقط إذا كانت مكتبته مثبتة (urllib3 يفك الضغط تلقائياً حينها)
+try:
+    import brotli  # noqa: F401  # type: ignore [reportMissingImports]
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+HTTP_POOL_SIZE = int(os.getenv("TREND_HTTP_POOL_SIZE", "16"))
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("TREND_HTTP_CACHE_MAX_ENTRIES", "512"))
+# مدة صلاحية الردود المحفوظة (بالثواني) قبل إعادة التحقق منها عند الخادم
+HTTP_DEFAULT_TTL = float(os.getenv("TREND_HTTP_DEFAULT_TTL", "600"))
+HOST_TTLS: Dict[str, float] = {
+    'www.youtube.com': 60.0,
+    'trends.google.com': 300.0,
+}
+
+class HttpStats(TypedDict):
+    # أحجام البايتات هنا هي طول الجسم بعد فك ضغط gzip/brotli، لا البايتات المنقولة فعلاً عبر الشبكة
+    hits: int
+    misses: int
+    revalidated: int
+    bytes_downloaded: int
+    bytes_saved: int
+
+@dataclass
+class CachedResponse:
+    """رد HTTP مبسّط يمكن حفظه وإعادة استخدامه بأمان بين الخيوط."""
+    url: str
+    status_code: int
+    content: bytes
+    headers: Mapping[str, str]
+    encoding: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+@dataclass
+class StreamedResponse:
+    """
+    رد HTTP يُقرأ جسمه على دفعات (chunks) دون تحميله كاملاً ولا حفظه في الذاكرة المؤقتة.
+    chunks مكرر عادي في العميل المتزامن ومكرر غير متزامن في AsyncHttpClient.
+    """
+    url: str
+    status_code: int
+    headers: Mapping[str, str]
+    encoding: Optional[str]
+    chunks: Union[Iterator[bytes], AsyncIterator[bytes]]
+    bytes_read: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+def _charset(headers: Mapping[str, str]) -> Optional[str]:
+    """الترميز المعلن في ترويسة Content-Type إن وجد."""
+    for param in headers.get('Content-Type', '').split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"\'')
+    return None
+
+_CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+@dataclass
+class _Entry:
+    response: CachedResponse
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+@dataclass
+class CacheLookup:
+    """نتيجة البحث في ذاكرة الردود: الرد الصالح إن وجد، وإلا ما يحتاجه HttpClient.store لتسجيل الرد الجديد."""
+    key: _CacheKey
+    requested_at: float
+    use_cache: bool
+    entry: Optional[_Entry] = None
+    response: Optional[CachedResponse] = None
+
+@dataclass
+class HttpClient:
+    """
+    طبقة HTTP مشتركة لكل المصادر: اتصالات دائمة (keep-alive) عبر مجمع اتصالات،
+    ضغط gzip/brotli، طلبات شرطية (ETag / Last-Modified) وذاكرة ردود محلية بصلاحية لكل نطاق.
+    """
+    pool_size: int = HTTP_POOL_SIZE
+    max_entries: int = HTTP_CACHE_MAX_ENTRIES
+    default_ttl: float = HTTP_DEFAULT_TTL
+    host_ttls: Dict[str, float] = field(default_factory=lambda: dict(HOST_TTLS))
+
+    def __post_init__(self) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self._cache: 'OrderedDict[_CacheKey, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: HttpStats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'bytes_downloaded': 0, 'bytes_saved': 0}
+
+    def ttl_for(self, url: str) -> float:
+        return self.host_ttls.get(urlsplit(url).hostname or '', self.default_ttl)
+
+    def get(self, url: str, headers: Optional[Mapping[str, str]] = None, timeout: float = 10,
+            use_cache: bool = True) -> CachedResponse:
+        """يجلب الرابط مع الاستفادة من الذاكرة المحلية والطلبات الشرطية."""
+        request_headers = dict(headers or {})
+        lookup = self.lookup(url, request_headers, use_cache)
+        if lookup.response is not None:
+            return lookup.response
+
+        response = self.session.get(url, headers=request_headers, timeout=timeout)
+        fresh = CachedResponse(
+            url=response.url or url,
+            status_code=response.status_code,
+            content=response.content,
+            headers=dict(response.headers),
+            encoding=response.encoding,
+        )
+        return self.store(lookup, fresh)
+
+    @contextmanager
+    def stream(self, url: str, headers: Optional[Mapping[str, str]] = None, timeout: float = 10,
+               chunk_size: int = 16384) -> Iterator[StreamedResponse]:
+        """
+        يفتح الرابط ويعيد جسمه على دفعات؛ الخروج من الكتلة يغلق الاتصال حتى لو لم يُقرأ الجسم كاملاً.
+        الرد لا يُحفظ في ذاكرة الردود، فالطلبات الشرطية هنا مسؤولية المستدعي (ورد 304 يُعاد كما هو).
+        العملاء المخصصون الذين يعيدون تعريف get (مثل التسجيل وإعادة التشغيل) يمرون عبر get كما هي.
+        """
+        if type(self).get is not HttpClient.get:
+            cached = self.get(url, headers=headers, timeout=timeout)
+            yield StreamedResponse(cached.url, cached.status_code, cached.headers, cached.encoding,
+                                   _iter_slices(cached.content, chunk_size))
+            return
+
+        response = self.session.get(url, headers=dict(headers or {}), timeout=timeout, stream=True)
+        streamed = StreamedResponse(response.url or url, response.status_code, dict(response.headers),
+                                    _charset(response.headers), iter(()))
+
+        def chunks() -> Iterator[bytes]:
+            for chunk in response.iter_content(chunk_size):
+                streamed.bytes_read += len(chunk)
+                yield chunk
+
+        streamed.chunks = chunks()
+        try:
+            yield streamed
+        finally:
+            response.close()
+            self.record(bytes_downloaded=streamed.bytes_read, revalidated=int(response.status_code == 304))
+
+    def lookup(self, url: str, request_headers: Dict[str, str], use_cache: bool = True) -> CacheLookup:
+        """
+        يبحث في الذاكرة: نتيجته تحمل الرد مباشرة إن كان صالحاً، وإلا يضيف ترويسات الطلب الشرطي
+        (If-None-Match / If-Modified-Since) إلى request_headers ويجب تمرير النتيجة إلى store مع الرد الجديد.
+        مشتركة بين العميل المتزامن وغير المتزامن.
+        """
+        key = (url, tuple(sorted(request_headers.items())))
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(key) if use_cache else None
+            if entry is not None and now - entry.fetched_at < self.ttl_for(url):
+                self._cache.move_to_end(key)
+                self._stats['hits'] += 1
+                self._stats['bytes_saved'] += len(entry.response.content)
+                return CacheLookup(key, now, use_cache, entry, entry.response)
+
+        if entry is not None:
+            if entry.etag:
+                request_headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request_headers['If-Modified-Since'] = entry.last_modified
+        return CacheLookup(key, now, use_cache, entry)
+
+    def store(self, lookup: CacheLookup, fresh: CachedResponse) -> CachedResponse:
+        """يسجل الرد الجديد في الذاكرة (أو يجدد المدخل القديم عند 304) ويعيد الرد المناسب."""
+        key, now, entry = lookup.key, lookup.requested_at, lookup.entry
+        with self._lock:
+            self._stats['bytes_downloaded'] += len(fresh.content)
+            if fresh.status_code == 304 and entry is not None:
+                entry.fetched_at = now
+                self._cache[key] = entry
+                self._cache.move_to_end(key)
+                self._stats['revalidated'] += 1
+                self._stats['bytes_saved'] += len(entry.response.content)
+                return entry.response
+
+            self._stats['misses'] += 1
+            cache_control = fresh.headers.get('Cache-Control', '')
+            if lookup.use_cache and fresh.status_code == 200 and 'no-store' not in cache_control:
+                self._cache[key] = _Entry(
+                    response=fresh,
+                    fetched_at=now,
+                    etag=fresh.headers.get('ETag'),
+                    last_modified=fresh.headers.get('Last-Modified'),
+                )
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            return fresh
+
+    def record(self, **counts: int) -> None:
+        """يضيف إلى العدادات (مثل misses=1 أو bytes_downloaded=n) للطلبات التي لا تمر عبر lookup و store."""
+        with self._lock:
+            for name, value in counts.items():
+                self._stats[name] += value  # type: ignore [literal-required]
+
+    def stats(self) -> HttpStats:
+        """نسخة من العدادات؛ bytes_downloaded و bytes_saved أحجام الأجسام بعد فك الضغط."""
+        with self._lock:
+            return {**self._stats}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+def _iter_slices(content: bytes, chunk_size: int) -> Iterator[bytes]:
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+async def _aiter_slices(content: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    for chunk in _iter_slices(content, chunk_size):
+        yield chunk
+
+_client = HttpClient()
+
+def get_client() -> HttpClient:
+    return _client
+
+def set_client(client: HttpClient) -> None:
+    """يستبدل العميل المشترك (مثلاً لتوجيه الطلبات إلى خادم محلي في الاختبارات)."""
+    global _client
+    _client = client
+
+def get(url: str, headers: Optional[Mapping[str, str]] = None, timeout: float = 10,
+        use_cache: bool = True) -> CachedResponse:
+    """نقطة الدخول المشتركة لكل طلبات HTTP في التطبيق."""
+    return _client.get(url, headers=headers, timeout=timeout, use_cache=use_cache)
+
+class AsyncHttpClient:
+    """
+    النسخة غير المتزامنة من طبقة HTTP (تتطلب aiohttp): تستخدم نفس ذاكرة الردود والعدادات
+    والطلبات الشرطية الخاصة بالعميل المشترك، فالجلب المتزامن وغير المتزامن يستفيدان من نفس الذاكرة.
+    جلسة aiohttp مرتبطة بحلقة الأحداث، لذا يُستخدم العميل داخل async with أو طوال عمر حلقة واحدة.
+    العملاء المخصصون (مثل عملاء التسجيل وإعادة التشغيل في replay.py) يُشغَّلون في خيط منفصل كما هم.
+    """
+
+    def __init__(self, client: Optional[HttpClient] = None, pool_size: int = HTTP_POOL_SIZE) -> None:
+        self.client = client or _client
+        self.pool_size = pool_size
+        self._session: Any = None
+
+    async def __aenter__(self) -> 'AsyncHttpClient':
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise RuntimeError("الجلب غير المتزامن يتطلب مكتبة aiohttp (pip install aiohttp).") from e
+        self._aiohttp = aiohttp
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            headers={'Accept-Encoding': ACCEPT_ENCODING},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get(self, url: str, headers: Optional[Mapping[str, str]] = None, timeout: float = 10,
+                  use_cache: bool = True) -> CachedResponse:
+        """مثل HttpClient.get لكن دون حجز خيط أثناء انتظار الشبكة."""
+        if type(self.client).get is not HttpClient.get:
+            return await asyncio.to_thread(self.client.get, url, headers=headers, timeout=timeout, use_cache=use_cache)
+        if self._session is None:
+            raise RuntimeError("يجب استخدام AsyncHttpClient داخل async with.")
+
+        request_headers = dict(headers or {})
+        lookup = self.client.lookup(url, request_headers, use_cache)
+        if lookup.response is not None:
+            return lookup.response
+
+        # أخطاء aiohttp تُحوّل إلى استثناءات requests حتى تشترك المصادر في نفس معالجة الأخطاء
+        try:
+            async with self._session.get(url, headers=request_headers,
+                                         timeout=self._aiohttp.ClientTimeout(total=timeout)) as response:
+                fresh = CachedResponse(
+                    url=str(response.url) or url,
+                    status_code=response.status,
+                    content=await response.read(),
+                    headers=dict(response.headers),
+                    encoding=response.charset,
+                )
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"انتهت مهلة الطلب: {url}") from e
+        except self._aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(f"{e} ({url})") from e
+        return self.client.store(lookup, fresh)
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[Mapping[str, str]] = None, timeout: float = 10,
+                     chunk_size: int = 16384) -> AsyncIterator[StreamedResponse]:
+        """مثل HttpClient.stream لكن الدفعات تُقرأ بـ async for."""
+        if type(self.client).get is not HttpClient.get:
+            cached = await asyncio.to_thread(self.client.get, url, headers=headers, timeout=timeout)
+            yield StreamedResponse(cached.url, cached.status_code, cached.headers, cached.encoding,
+                                   _aiter_slices(cached.content, chunk_size))
+            return
+        if self._session is None:
+            raise RuntimeError("يجب استخدام AsyncHttpClient داخل async with.")
+
+        try:
+            response = await self._session.get(url, headers=dict(headers or {}),
+                                               timeout=self._aiohttp.ClientTimeout(total=timeout))
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"انتهت مهلة الطلب: {url}") from e
+        except self._aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(f"{e} ({url})") from e
+        streamed = StreamedResponse(str(response.url) or url, response.status, dict(response.headers),
+                                    response.charset, _aiter_slices(b'', chunk_size))
+
+        async def chunks() -> AsyncIterator[bytes]:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                streamed.bytes_read += len(chunk)
+                yield chunk
+
+        streamed.chunks = chunks()
+        try:
+            yield streamed
+        finally:
+            # الرد غير المقروء كاملاً يغلق اتصاله بدلاً من إعادته إلى المجمع
+            if response.content.at_eof():
+                response.release()
+            else:
+                response.close()
+            self.client.record(bytes_downloaded=streamed.bytes_read, revalidated=int(response.status == 304))
+
+def stats() -> HttpStats:
+    """عدادات الإصابة والإخفاق والبايتات الموفرة."""
+    return _client.stats()
+
+def _collect_metrics() -> List[Tuple[str, Dict[str, str], float]]:
+    return [(f'trend_http_{name}_total', {}, float(value)) for name, value in stats().items()]
+
+metrics.register_collector(_collect_metrics)
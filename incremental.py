@@ -0,0 +1,159 @@
+import heapq
+from collections import Counter
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import metrics
+from analyzer import AnalysisResults, Post, SentimentInfo, title_words
+from sentiment import score_titles
+
+# مفتاح المنشور: الرابط مع ترتيب ظهوره (لتمييز الروابط المكررة في نفس اللقطة)
+PostKey = Tuple[str, int]
+
+_views = itemgetter('views')
+_likes = itemgetter('likes')
+
+@dataclass
+class _Entry:
+    title: str
+    sentiment: float
+    words: List[str]
+
+class IncrementalAnalyzer:
+    """
+    محلل تزايدي: يقارن اللقطة الجديدة بالسابقة حسب الرابط ويعالج فقط ما تغيّر.
+    عدادات الكلمات تُحدَّث بإضافة وطرح كلمات العناوين الداخلة والخارجة فقط،
+    والمشاعر تُحسب للعناوين الجديدة فقط. النتيجة مطابقة تماماً لـ analyze_trends.
+    """
+
+    def __init__(self, top_keywords: int = 5) -> None:
+        self.top_keywords = top_keywords
+        self._entries: Dict[PostKey, _Entry] = {}
+        self._word_counts: Counter[str] = Counter()
+        # إحصاءات آخر تحديث: عدد المنشورات الجديدة والمحذوفة وتلك التي تغيّر عنوانها
+        self.last_added = 0
+        self.last_removed = 0
+        self.last_retitled = 0
+
+    @property
+    def word_counts(self) -> Counter[str]:
+        """عدادات كلمات اللقطة الحالية (للقراءة فقط)."""
+        return self._word_counts
+
+    def reset(self) -> None:
+        self._entries.clear()
+        self._word_counts.clear()
+
+    @metrics.timed('trend_stage_seconds', stage='analyze')
+    def update(self, posts: Sequence[Post]) -> Optional[AnalysisResults]:
+        """يحدّث الحالة باللقطة الجديدة ويعيد نفس نتيجة analyze_trends(posts)."""
+        if not posts:
+            print("لا توجد بيانات لتحليلها.")
+            self.reset()
+            return None
+
+        print("جاري تحليل البيانات المستلمة (تحليل تزايدي)...")
+
+        entries = self._entries
+        keys = self._keys(posts)
+        removed = entries.keys() - set(keys)
+        for key in removed:
+            self._drop_words(entries.pop(key).words)
+
+        # المشاعر تُحسب فقط للعناوين الجديدة أو التي تغيّرت
+        needs_score = [
+            post['title'] for key, post in zip(keys, posts)
+            if key not in entries or entries[key].title != post['title']
+        ]
+        fresh_scores = dict(zip(needs_score, score_titles(needs_score))) if needs_score else {}
+
+        added = retitled = 0
+        sentiments: List[float] = []
+        for key, post in zip(keys, posts):
+            title = post['title']
+            entry = entries.get(key)
+            if entry is None:
+                entry = _Entry(title, fresh_scores[title], title_words(title))
+                self._word_counts.update(entry.words)
+                entries[key] = entry
+                added += 1
+            elif entry.title != title:
+                self._drop_words(entry.words)
+                entry.title = title
+                entry.words = title_words(title)
+                entry.sentiment = fresh_scores[title]
+                self._word_counts.update(entry.words)
+                retitled += 1
+            sentiments.append(entry.sentiment)
+
+        self.last_added, self.last_removed, self.last_retitled = added, len(removed), retitled
+
+        # المشاهدات تتغير لكل المنشورات تقريباً في كل تحديث، لذا تمريرة خطية واحدة أرخص من صيانة كومة.
+        # max/min تعيد أول عنصر عند التساوي، تماماً مثل الفرز المستقر في التحليل الكامل.
+        positions = range(len(posts))
+        loved = max(positions, key=sentiments.__getitem__)
+        hated = min(positions, key=sentiments.__getitem__)
+        most_loved: SentimentInfo = {'post': posts[loved], 'sentiment': sentiments[loved]}
+        most_hated: SentimentInfo = {'post': posts[hated], 'sentiment': sentiments[hated]}
+        analysis: AnalysisResults = {
+            'most_viewed': max(posts, key=_views),
+            'most_liked': max(posts, key=_likes),
+            'most_loved': most_loved,
+            'most_hated': most_hated,
+            'top_keywords': self._top_keywords(keys),
+        }
+        return analysis
+
+    @staticmethod
+    def _keys(posts: Sequence[Post]) -> List[PostKey]:
+        seen: Dict[str, int] = {}
+        keys: List[PostKey] = []
+        for post in posts:
+            occurrence = seen.get(post['url'], 0)
+            seen[post['url']] = occurrence + 1
+            keys.append((post['url'], occurrence))
+        return keys
+
+    def _drop_words(self, words: List[str]) -> None:
+        counts = self._word_counts
+        for word in words:
+            remaining = counts[word] - 1
+            if remaining > 0:
+                counts[word] = remaining
+            else:
+                del counts[word]
+
+    def _top_keywords(self, keys: List[PostKey]) -> List[Tuple[str, int]]:
+        """
+        أكثر الكلمات تكراراً بنفس ترتيب Counter.most_common في التحليل الكامل:
+        عند التساوي تُقدَّم الكلمة التي ظهرت أولاً في العناوين.
+        """
+        counts = self._word_counts
+        n = self.top_keywords
+        if not counts or n <= 0:
+            return []
+        cutoff = heapq.nlargest(n, counts.values())[-1]
+        above: Set[str] = {word for word, count in counts.items() if count > cutoff}
+        needed_at_cutoff = n - len(above)
+
+        # المرور على الكلمات بترتيب ظهورها حتى نجد كل الكلمات المطلوبة
+        first_seen: Dict[str, int] = {}
+        found_above = found_at_cutoff = 0
+        index = 0
+        for key in keys:
+            for word in self._entries[key].words:
+                if word not in first_seen:
+                    count = counts[word]
+                    if count > cutoff:
+                        first_seen[word] = index
+                        found_above += 1
+                    elif count == cutoff and found_at_cutoff < needed_at_cutoff:
+                        first_seen[word] = index
+                        found_at_cutoff += 1
+                index += 1
+            if found_above == len(above) and found_at_cutoff >= needed_at_cutoff:
+                break
+
+        ranked = sorted(first_seen, key=lambda word: (-counts[word], first_seen[word]))
+        return [(word, counts[word]) for word in ranked[:n]]
@@ -0,0 +1,22 @@
+import json
+from typing import Any
+
+# استخدام orjson إن كان مثبتاً لأنه أسرع بكثير في تحويل JSON الكبير (صفحات يوتيوب واللقطات المشتركة)
+try:
+    import orjson
+
+    def dumps(data: Any) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    def dumps(data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def loads(data: bytes) -> Any:
+        return json.loads(data)
+
+    JSON_BACKEND = 'json'
@@ -0,0 +1,202 @@
+import heapq
+import os
+import re
+import time
+from collections import Counter, deque
+from itertools import islice
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple, TypedDict
+
+# نمط الكلمات مُجمّع مسبقاً لاستخدامه في كل عمليات التحليل
+WORD_RE = re.compile(r'\b\w+\b')
+
+DEFAULT_STOP_WORDS = frozenset([
+    'من', 'عن', 'في', 'و', 'أو', 'إلى', 'هو', 'هي', 'هذا', 'هذه', 'جدا', 'تم', 'علي', 'مع', 'بعد', 'أن',
+    'على', 'ما', 'لا', 'كل', 'قبل', 'the', 'a', 'an', 'of', 'to', 'in', 'and', 'on', 'for', 'is',
+])
+# كلمات توقف إضافية: قائمة مفصولة بفواصل، أو ملف فيه كلمة في كل سطر
+STOP_WORDS_EXTRA = os.getenv("TREND_STOP_WORDS", "")
+STOP_WORDS_FILE = os.getenv("TREND_STOP_WORDS_FILE")
+KEYWORD_SKETCH_CAPACITY = int(os.getenv("TREND_KEYWORD_SKETCH_CAPACITY", "2000"))
+
+# توحيد الكتابة العربية: حذف التشكيل والتطويل، وتوحيد أشكال الألف والتاء المربوطة والألف المقصورة
+_ARABIC_TABLE = str.maketrans(
+    {**{chr(c): None for c in range(0x064B, 0x0653)}, 'ـ': None,
+     'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ة': 'ه', 'ى': 'ي'}
+)
+
+def normalize_arabic(text: str) -> str:
+    """يوحّد الحروف العربية المتغيرة حتى تُحسب الأشكال المختلفة للكلمة كلمة واحدة."""
+    return text.lower().translate(_ARABIC_TABLE)
+
+def load_stop_words(extra: str = STOP_WORDS_EXTRA, path: Optional[str] = STOP_WORDS_FILE) -> FrozenSet[str]:
+    words = set(DEFAULT_STOP_WORDS)
+    words.update(word.strip() for word in extra.split(',') if word.strip())
+    if path:
+        with open(path, encoding='utf-8') as f:
+            words.update(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return frozenset(normalize_arabic(word) for word in words)
+
+class Tokenizer:
+    """مقطّع العناوين إلى كلمات مفتاحية موحّدة، بدون كلمات التوقف والأرقام."""
+
+    def __init__(self, stop_words: Optional[Iterable[str]] = None) -> None:
+        self.stop_words = load_stop_words() if stop_words is None else frozenset(normalize_arabic(w) for w in stop_words)
+
+    def tokenize(self, title: str) -> List[str]:
+        stop_words = self.stop_words
+        return [word for word in WORD_RE.findall(normalize_arabic(title)) if word not in stop_words and not word.isdigit()]
+
+    def count(self, titles: Iterable[str], chunk_size: int = 4096) -> Counter[str]:
+        """
+        يحسب تكرار الكلمات على دفعات من العناوين بدلاً من دمجها كلها في نص واحد.
+        التوحيد يتم على الدفعة كاملة قبل التقطيع (لأن التشكيل ليس من حروف \\w ويقسم الكلمة)،
+        وكلمات التوقف والأرقام تُحذف مرة واحدة لكل كلمة فريدة بعد العد، لا لكل ظهور.
+        """
+        word_counts: Counter[str] = Counter()
+        iterator = iter(titles)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            word_counts.update(WORD_RE.findall(normalize_arabic(' '.join(chunk))))
+
+        stop_words = self.stop_words
+        for word in [w for w in word_counts if w in stop_words or w.isdigit()]:
+            del word_counts[word]
+        return word_counts
+
+_tokenizer: Optional[Tokenizer] = None
+
+def get_tokenizer() -> Tokenizer:
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = Tokenizer()
+    return _tokenizer
+
+def set_tokenizer(tokenizer: Optional[Tokenizer]) -> None:
+    global _tokenizer
+    _tokenizer = tokenizer
+
+class SketchState(TypedDict):
+    capacity: int
+    counters: List[Tuple[str, int, int]]
+
+class SpaceSaving:
+    """
+    ملخص Space-Saving لأكثر الكلمات تكراراً بذاكرة ثابتة: يحتفظ بعدد محدد من العدادات فقط،
+    وعند امتلائه تحل الكلمة الجديدة محل الأقل عدداً وترث عدده كحد أعلى للخطأ.
+    كل كلمة تكرارها الحقيقي أكبر من N/capacity مضمونة الظهور. الملخصات قابلة للدمج
+    (بين عمال مختلفين أو فترات زمنية مختلفة) ويمكن تحويلها إلى JSON.
+    """
+
+    def __init__(self, capacity: int = KEYWORD_SKETCH_CAPACITY) -> None:
+        self.capacity = capacity
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        # كومة صغرى مع حذف كسول: العناصر القديمة تُهمل عند إخراجها إذا لم تعد تطابق العداد الحالي
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def update(self, word: str, count: int = 1) -> None:
+        counts = self._counts
+        if word in counts:
+            counts[word] += count
+        elif len(counts) < self.capacity:
+            counts[word] = count
+            self._errors[word] = 0
+        else:
+            floor = self._pop_min()
+            counts[word] = floor + count
+            self._errors[word] = floor
+        heapq.heappush(self._heap, (counts[word], word))
+        if len(self._heap) > 4 * self.capacity + 64:
+            self._heap = [(c, w) for w, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def update_counts(self, counts: Iterable[Tuple[str, int]]) -> None:
+        for word, count in counts:
+            self.update(word, count)
+
+    def _pop_min(self) -> int:
+        counts, heap = self._counts, self._heap
+        while True:
+            count, word = heapq.heappop(heap)
+            if counts.get(word) == count:
+                del counts[word]
+                del self._errors[word]
+                return count
+
+    def min_count(self) -> int:
+        """أقل عداد محفوظ (الحد الأعلى لتكرار أي كلمة غير موجودة في الملخص)، أو صفر إن لم يمتلئ."""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(k, self._counts.items(), key=lambda item: item[1])
+
+    def error(self, word: str) -> int:
+        return self._errors.get(word, self.min_count())
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """يدمج ملخصين ويعيد ملخصاً جديداً بنفس السعة (الأكبر من السعتين)."""
+        capacity = max(self.capacity, other.capacity)
+        floor_self, floor_other = self.min_count(), other.min_count()
+        combined: Dict[str, Tuple[int, int]] = {}
+        for word in self._counts.keys() | other._counts.keys():
+            count = self._counts.get(word, floor_self) + other._counts.get(word, floor_other)
+            error = self._errors.get(word, floor_self) + other._errors.get(word, floor_other)
+            combined[word] = (count, error)
+        merged = SpaceSaving(capacity)
+        for word, (count, error) in heapq.nlargest(capacity, combined.items(), key=lambda item: item[1][0]):
+            merged._counts[word] = count
+            merged._errors[word] = error
+        merged._heap = [(c, w) for w, c in merged._counts.items()]
+        heapq.heapify(merged._heap)
+        return merged
+
+    def to_state(self) -> SketchState:
+        return {'capacity': self.capacity, 'counters': [(w, c, self._errors[w]) for w, c in self._counts.items()]}
+
+    @classmethod
+    def from_state(cls, state: SketchState) -> 'SpaceSaving':
+        sketch = cls(state['capacity'])
+        for word, count, error in state['counters']:
+            sketch._counts[word] = count
+            sketch._errors[word] = error
+        sketch._heap = [(c, w) for w, c in sketch._counts.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+# --- نافذة زمنية من الملخصات ---
+KEYWORD_WINDOW_BUCKET = float(os.getenv("TREND_KEYWORD_WINDOW_BUCKET", "3600"))
+KEYWORD_WINDOW_BUCKETS = int(os.getenv("TREND_KEYWORD_WINDOW_BUCKETS", "24"))
+
+class KeywordWindow:
+    """
+    أكثر الكلمات تكراراً خلال فترة متحركة (افتراضياً 24 ساعة): ملخص Space-Saving لكل فترة جزئية،
+    والنتيجة دمج ملخصات الفترات الحالية. الذاكرة محدودة بعدد الفترات × سعة الملخص.
+    """
+
+    def __init__(self, bucket_seconds: float = KEYWORD_WINDOW_BUCKET, buckets: int = KEYWORD_WINDOW_BUCKETS,
+                 capacity: int = KEYWORD_SKETCH_CAPACITY) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self._buckets: Deque[Tuple[int, SpaceSaving]] = deque(maxlen=buckets)
+
+    def add(self, counts: Iterable[Tuple[str, int]], now: Optional[float] = None) -> None:
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] != bucket:
+            self._buckets.append((bucket, SpaceSaving(self.capacity)))
+        self._buckets[-1][1].update_counts(counts)
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        oldest = current - (self._buckets.maxlen or 0) + 1
+        merged = SpaceSaving(self.capacity)
+        for bucket, sketch in self._buckets:
+            if bucket >= oldest:
+                merged = merged.merge(sketch)
+        return merged.top(k)
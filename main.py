@@ -1,11 +1,14 @@
+import argparse
+import os
 import re
-import json
 from collections import Counter
-from typing import List, Dict, Any, Optional, TypedDict
-from textblob import TextBlob
+from typing import List, Optional, TypedDict
 import requests
-from bs4 import BeautifulSoup
+import httpcache
+from numparse import parse_count
 from dotenv import load_dotenv
+from sentiment import score_titles
+from yt_extract import extract_yt_initial_data
 # تحميل متغيرات البيئة من ملف .env
 load_dotenv()
 
@@ -42,24 +45,6 @@ def fetch_twitter_mock_data() -> List[Post]:
     ]
     return mock_posts
 
-def _parse_youtube_views(views_text: Optional[str]) -> int:
-    """دالة مساعدة لتحويل نص عدد المشاهدات في يوتيوب إلى رقم صحيح."""
-    if not views_text:
-        return 0
-    cleaned_text = views_text.lower().replace('مشاهدة', '').replace('views', '').replace(',', '').strip()
-    
-    value_text = ''.join(filter(lambda x: x.isdigit() or x == '.', cleaned_text))
-    if not value_text:
-        return 0
-    value = float(value_text)
-
-    if 'k' in cleaned_text or 'ألف' in cleaned_text:
-        return int(value * 1000)
-    if 'm' in cleaned_text or 'مليون' in cleaned_text:
-        return int(value * 1000000)
-    
-    return int(value)
-
 def scrape_youtube_trending() -> List[Post]:
     """يجلب أحدث التريندات من يوتيوب باستخدام كشط الويب المحسّن."""
     print("جاري جلب تريند يوتيوب عن طريق Web Scraping...")
@@ -70,31 +55,14 @@ def scrape_youtube_trending() -> List[Post]:
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = httpcache.get(url, headers=headers, timeout=10)
         response.raise_for_status() # التأكد من نجاح الطلب
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # بيانات يوتيوب غالباً ما تكون ضمن متغير JavaScript يسمى ytInitialData
-        scripts = soup.find_all('script')
-        data_script = None
-        for script in scripts:
-            script_text = script.get_text()
-            if 'ytInitialData' in script_text:
-                data_script = script_text
-                break
-        
-        if not data_script:
+        data = extract_yt_initial_data(response.content)
+        if data is None:
             print("لم يتم العثور على بيانات التريند في صفحة يوتيوب.")
             return []
-            
-        # استخلاص الجزء الخاص بـ JSON من السكربت
-        json_data_str = data_script.split(' = ')[1]
-        # إزالة الفاصلة المنقوطة في النهاية إذا وجدت
-        if json_data_str.endswith(';'):
-            json_data_str = json_data_str[:-1]
-            
-        data: Dict[str, Any] = json.loads(json_data_str)
         
         # --- مسار مرن للوصول إلى الفيديوهات ---
         video_items = []
@@ -132,7 +100,7 @@ def scrape_youtube_trending() -> List[Post]:
             youtube_trends.append({
                 'platform': 'YouTube',
                 'title': title,
-                'views': _parse_youtube_views(views_text),
+                'views': parse_count(views_text),
                 'likes': 0, # الإعجابات غير متوفرة مباشرة في صفحة التريند
                 'url': 'https://youtube.com/watch?v=' + video_id
             })
@@ -156,11 +124,12 @@ def analyze_trends(posts: List[Post]) -> Optional[AnalysisResults]:
     print("جاري تحليل البيانات المستلمة...")
 
     # 1. تحليل المشاعر للعثور على المحتوى الأكثر حباً وكراهية
-    sentiments: List[SentimentInfo] = []
-    for post in posts:
-        # استخدام TextBlob لتحليل النص. القطبية (polarity) تتراوح من -1 (سلبي جداً) إلى +1 (إيجابي جداً)
-        sentiment = TextBlob(post['title']).sentiment.polarity
-        sentiments.append({'post': post, 'sentiment': sentiment})
+    # القطبية (polarity) تتراوح من -1 (سلبي جداً) إلى +1 (إيجابي جداً)
+    # يتم تقييم العناوين دفعة واحدة مع ذاكرة مؤقتة للعناوين المتكررة
+    scores = score_titles([post['title'] for post in posts])
+    sentiments: List[SentimentInfo] = [
+        {'post': post, 'sentiment': sentiment} for post, sentiment in zip(posts, scores)
+    ]
     
     # التأكد من وجود بيانات مشاعر قبل المتابعة
     if not sentiments:
@@ -264,12 +233,48 @@ def fetch_all_trends() -> List[Post]:
     print(f"\nتم جلب ما مجموعه {len(all_posts)} منشوراً من جميع المصادر.")
     return all_posts
 
+def export_trends(out: str, fmt: str, interval: float) -> None:
+    """
+    يجلب ويحلل التريندات من كل المصادر ويصدّر كل لقطة إلى ملفات Parquet أو Arrow مقسمة حسب التاريخ والمنصة.
+    interval=0 يعني لقطة واحدة ثم الخروج، وإلا يستمر التصدير كل interval ثانية.
+    """
+    from export import SnapshotExporter
+    from pipeline import AnalysisPipeline
+    from refresher import RefreshScheduler
+
+    exporter = SnapshotExporter(out, fmt)
+    scheduler = RefreshScheduler(interval=interval, analyze=AnalysisPipeline())
+    scheduler.add_listener(exporter.add)
+    try:
+        if interval <= 0:
+            if not scheduler.refresh():
+                raise SystemExit(f"فشل التحديث: {scheduler.last_error}")
+        else:
+            scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    finally:
+        written = exporter.flush()
+        print(f"تم تصدير اللقطات إلى {out} ({written} ملفاً في آخر دفعة).")
+
 if __name__ == "__main__":
-    # 1. جلب البيانات
-    social_media_posts: List[Post] = fetch_all_trends()
-    
-    # 2. تحليل البيانات
-    analyzed_data: Optional[AnalysisResults] = analyze_trends(social_media_posts)
-    
-    # 3. عرض النتائج
-    display_results(analyzed_data)
+    parser = argparse.ArgumentParser(description="جلب وتحليل التريندات")
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('report', help="عرض تقرير التريندات في الطرفية (الافتراضي)")
+    export_parser = commands.add_parser('export', help="تصدير اللقطات إلى ملفات Parquet أو Arrow مقسمة")
+    export_parser.add_argument('--out', default=os.getenv("TREND_EXPORT_PATH") or "exports")
+    export_parser.add_argument('--format', choices=['parquet', 'arrow'], default=os.getenv("TREND_EXPORT_FORMAT", "parquet"))
+    export_parser.add_argument('--interval', type=float, default=0.0, help="الفاصل بين اللقطات بالثواني (0 للقطة واحدة)")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_trends(args.out, args.format, args.interval)
+    else:
+        # 1. جلب البيانات
+        social_media_posts: List[Post] = fetch_all_trends()
+
+        # 2. تحليل البيانات
+        analyzed_data: Optional[AnalysisResults] = analyze_trends(social_media_posts)
+
+        # 3. عرض النتائج
+        display_results(analyzed_data)
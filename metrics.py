@@ -0,0 +1,145 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+F = TypeVar('F', bound=Callable[..., Any])
+LabelKey = Tuple[Tuple[str, str], ...]
+# دالة تجمع قيم عدادات خارجية عند عرض المقاييس (مثل عدادات طبقة HTTP)
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+# حدود الدلاء بالثواني، من عمليات التحليل السريعة حتى مهلات الشبكة
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """مدرج تكراري بحدود ثابتة؛ كل تسجيل هو بحث ثنائي وزيادة عداد فقط."""
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted(labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Registry:
+    """سجل مقاييس خفيف يعرض القيم بصيغة Prometheus النصية."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Collector] = []
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """يقيس زمن الكتلة ويسجل الخطأ (مع إعادة رفعه) إذا فشلت."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc('trend_errors_total', **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels: str) -> Callable[[F], F]:
+        """مزخرف يقيس زمن كل استدعاء للدالة."""
+        def decorator(fn: F) -> F:
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper  # type: ignore [return-value]
+        return decorator
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h.counts), h.total, h.count, h.buckets) for key, h in self._histograms.items()}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                counters[(name, _label_key(labels))] = value
+
+        lines: List[str] = []
+        seen: set[str] = set()
+
+        def header(name: str, kind: str) -> None:
+            if name in seen:
+                return
+            seen.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {repr(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+REGISTRY.describe('trend_stage_seconds', "زمن كل مرحلة من مراحل جلب وتحليل وعرض التريندات")
+REGISTRY.describe('trend_errors_total', "عدد الأخطاء في كل مرحلة")
+REGISTRY.describe('trend_items_parsed_total', "عدد العناصر المستخرجة من كل مصدر")
+REGISTRY.describe('trend_article_bytes_total', "عدد بايتات المقالات المقروءة للتلخيص")
+REGISTRY.describe('trend_circuit_opened_total', "عدد مرات فتح قاطع الدائرة لكل مصدر")
+REGISTRY.describe('trend_circuit_skips_total', "عدد الطلبات التي تم تجاوزها لأن قاطع المصدر مفتوح")
+REGISTRY.describe('trend_negative_cache_hits_total', "عدد الروابط التي تم تجاوزها لأنها فشلت مؤخراً")
+REGISTRY.describe('trend_http_bytes_downloaded_total', "حجم أجسام ردود HTTP المستلمة بعد فك الضغط (ليس حجمها على الشبكة)")
+REGISTRY.describe('trend_http_bytes_saved_total', "حجم أجسام الردود (بعد فك الضغط) التي أغنت عنها الذاكرة المحلية أو ردود 304")
+
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+register_collector = REGISTRY.register_collector
+render = REGISTRY.render
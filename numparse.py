@@ -0,0 +1,41 @@
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+
+NUMPARSE_CACHE_SIZE = int(os.getenv("TREND_NUMPARSE_CACHE_SIZE", "4096"))
+
+# الأرقام العربية-الهندية والفارسية، والفاصلة العشرية وفاصل الآلاف العربيان
+_DIGITS_TABLE = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹٫٬', '01234567890123456789.,')
+
+_MULTIPLIERS = {
+    'k': 1_000, 'ألف': 1_000, 'الف': 1_000, 'آلاف': 1_000, 'الاف': 1_000, 'ألاف': 1_000,
+    'm': 1_000_000, 'مليون': 1_000_000, 'ملايين': 1_000_000,
+    'b': 1_000_000_000, 'مليار': 1_000_000_000, 'مليارات': 1_000_000_000,
+}
+# الرقم (مع فواصل الآلاف وجزء عشري اختياري) ثم لاحقة المقدار الملاصقة له إن وجدت.
+# اللواحق الإنجليزية يجب ألا يليها حرف لاتيني حتى لا تُقرأ "12 min" أو "5 months" كمقادير.
+_COUNT_RE = re.compile(
+    r'(\d[\d,]*(?:\.\d+)?)\s*(مليارات|مليار|ملايين|مليون|آلاف|ألاف|الاف|ألف|الف|[kmb](?![a-z]))?',
+    re.IGNORECASE,
+)
+
+@lru_cache(maxsize=NUMPARSE_CACHE_SIZE)
+def parse_count(text: Optional[str]) -> int:
+    """
+    يحوّل نص عدد (مشاهدات يوتيوب، حجم بحث جوجل...) إلى رقم صحيح:
+    "1,234 views" و"1.2M views" و"200K+" و"١٫٥ مليون مشاهدة" و"٣ آلاف". يعيد 0 إذا لم يجد رقماً.
+    النتائج محفوظة في ذاكرة LRU لأن نفس النصوص تتكرر كثيراً بين التحديثات.
+    """
+    if not text:
+        return 0
+    if not text.isascii():
+        text = text.translate(_DIGITS_TABLE)
+    match = _COUNT_RE.search(text)
+    if match is None:
+        return 0
+    number, suffix = match.groups()
+    value = float(number.replace(',', ''))
+    if suffix:
+        value *= _MULTIPLIERS[suffix.lower()]
+    return int(round(value))
@@ -0,0 +1,55 @@
+import atexit
+import os
+from typing import List, Optional
+
+from analyzer import AnalysisResults, Post
+from incremental import IncrementalAnalyzer
+from keywords import KeywordWindow
+from refresher import RefreshScheduler, Snapshot
+from velocity import TrendVelocity
+
+class AnalysisPipeline:
+    """
+    سلسلة التحليل المستخدمة في كل تحديث: تحليل تزايدي يعالج فقط المنشورات التي تغيّرت منذ اللقطة السابقة،
+    ثم سرعة صعود كل منشور وكلمة مقارنة باللقطات السابقة، وأبرز الكلمات خلال آخر 24 ساعة.
+    الحالة محفوظة بين التحديثات لذا يجب أن تعيش في نفس العملية التي تشغّل الجدولة.
+    """
+
+    def __init__(self) -> None:
+        self.incremental = IncrementalAnalyzer()
+        self.velocity = TrendVelocity()
+        self.keyword_window = KeywordWindow()
+
+    def __call__(self, posts: List[Post]) -> Optional[AnalysisResults]:
+        analysis = self.velocity.annotate(self.incremental.update(posts), posts)
+        if analysis is not None:
+            self.keyword_window.add(self.incremental.word_counts.items())
+            analysis['window_keywords'] = self.keyword_window.top(self.incremental.top_keywords)
+        return analysis
+
+def attach_history(scheduler: RefreshScheduler) -> None:
+    """يحفظ كل لقطة في المخزن التاريخي عند تحديد مساره في TREND_STORE_PATH."""
+    if not os.getenv("TREND_STORE_PATH"):
+        return
+    from store import TrendStore
+
+    history = TrendStore(os.environ["TREND_STORE_PATH"])
+
+    def _record_snapshot(snapshot: Snapshot) -> None:
+        # منشورات المصادر المتعطلة مكررة من لقطة سابقة وليست قياسات جديدة
+        fresh = (post for post in snapshot.posts if not post.get('stale'))
+        history.append_snapshot(fresh, taken_at=snapshot.created_at)
+        history.compact_if_due()
+
+    scheduler.add_listener(_record_snapshot)
+
+def attach_export(scheduler: RefreshScheduler) -> None:
+    """يصدّر كل لقطة إلى ملفات Parquet أو Arrow مقسمة عند تحديد مجلدها في TREND_EXPORT_PATH."""
+    if not os.getenv("TREND_EXPORT_PATH"):
+        return
+    from export import SnapshotExporter
+
+    exporter = SnapshotExporter(os.environ["TREND_EXPORT_PATH"])
+    scheduler.add_listener(exporter.add)
+    # الصفوف التي لم تبلغ حجم الدفعة بعد تُكتب عند خروج العملية
+    atexit.register(exporter.close)
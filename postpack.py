@@ -0,0 +1,148 @@
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union, overload
+
+from analyzer import Post, RegionRank
+
+# الحقول النصية التي تُخزن كقائمة لكل حقل (عمود) بدلاً من قاموس لكل منشور
+_TEXT_COLUMNS = {
+    'title': 'titles',
+    'url': 'urls',
+    'thumbnail': 'thumbnails',
+    'published_time': 'published_times',
+    'summary': 'summaries',
+}
+POST_FIELDS: Tuple[str, ...] = ('platform', 'title', 'views', 'likes', 'url', 'thumbnail', 'channel', 'published_time', 'summary')
+
+class StringTable:
+    """جدول نصوص متكررة (المنصة والقناة): كل نص يُخزن مرة واحدة ويشير إليه كل منشور برقم صغير."""
+    __slots__ = ('values', '_codes')
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+class PostPack:
+    """
+    حاوية مضغوطة لمنشورات لقطة واحدة: الأرقام في مصفوفات array من نوع int64،
+    والمنصة والقناة أرقام في جدول نصوص، وباقي النصوص أعمدة (قوائم).
+    العناصر تُقرأ عبر PostView بدون نسخ، فالقوالب ودوال التحليل تتعامل معها كما تتعامل مع Post.
+    الحاوية لا تُعدّل بعد بنائها (قد تشير إليها مصفوفات Arrow بدون نسخ عند التصدير).
+    """
+    __slots__ = ('views', 'likes', 'platforms', 'channels', 'platform_codes', 'channel_codes',
+                 'titles', 'urls', 'thumbnails', 'published_times', 'summaries', 'regions', 'stale')
+
+    def __init__(self) -> None:
+        self.views = array('q')
+        self.likes = array('q')
+        self.platforms = StringTable()
+        self.channels = StringTable()
+        self.platform_codes = array('I')
+        self.channel_codes = array('I')
+        self.titles: List[str] = []
+        self.urls: List[str] = []
+        self.thumbnails: List[str] = []
+        self.published_times: List[str] = []
+        self.summaries: List[str] = []
+        # المناطق نادرة (تريندات جوجل فقط) لذا تُخزن حسب رقم المنشور
+        self.regions: Dict[int, List[RegionRank]] = {}
+        # أرقام المنشورات المأخوذة من آخر جلب ناجح لمصدر متعطل
+        self.stale: Set[int] = set()
+
+    @classmethod
+    def from_posts(cls, posts: Iterable[Post]) -> 'PostPack':
+        pack = cls()
+        for post in posts:
+            pack.append(post)
+        return pack
+
+    def append(self, post: Post) -> None:
+        if 'regions' in post:
+            self.regions[len(self.titles)] = post['regions']
+        if post.get('stale'):
+            self.stale.add(len(self.titles))
+        self.views.append(post['views'])
+        self.likes.append(post['likes'])
+        self.platform_codes.append(self.platforms.code(post['platform']))
+        self.channel_codes.append(self.channels.code(post['channel']))
+        self.titles.append(post['title'])
+        self.urls.append(post['url'])
+        self.thumbnails.append(post['thumbnail'])
+        self.published_times.append(post['published_time'])
+        self.summaries.append(post['summary'])
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @overload
+    def __getitem__(self, index: int) -> 'PostView': ...
+    @overload
+    def __getitem__(self, index: slice) -> List['PostView']: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union['PostView', List['PostView']]:
+        if isinstance(index, slice):
+            return [PostView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("رقم المنشور خارج النطاق")
+        return PostView(self, index)
+
+    def __iter__(self) -> Iterator['PostView']:
+        for i in range(len(self)):
+            yield PostView(self, i)
+
+    def to_posts(self, start: int = 0, stop: Optional[int] = None) -> List[Post]:
+        """ينشئ قواميس Post عادية لجزء من المنشورات (مثلاً لصفحة واحدة من واجهة JSON)."""
+        return [view.to_post() for view in self[start:stop]]
+
+class PostView(Mapping[str, Any]):
+    """عرض للقراءة فقط لمنشور واحد داخل PostPack، يتصرف كقاموس Post دون إنشاء قاموس فعلي."""
+    __slots__ = ('_pack', '_index')
+
+    def __init__(self, pack: PostPack, index: int) -> None:
+        self._pack = pack
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        pack, i = self._pack, self._index
+        column = _TEXT_COLUMNS.get(key)
+        if column is not None:
+            return getattr(pack, column)[i]
+        if key == 'views':
+            return pack.views[i]
+        if key == 'likes':
+            return pack.likes[i]
+        if key == 'platform':
+            return pack.platforms.values[pack.platform_codes[i]]
+        if key == 'channel':
+            return pack.channels.values[pack.channel_codes[i]]
+        if key == 'regions' and i in pack.regions:
+            return pack.regions[i]
+        if key == 'stale' and i in pack.stale:
+            return True
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from POST_FIELDS
+        if self._index in self._pack.regions:
+            yield 'regions'
+        if self._index in self._pack.stale:
+            yield 'stale'
+
+    def __len__(self) -> int:
+        return len(POST_FIELDS) + (self._index in self._pack.regions) + (self._index in self._pack.stale)
+
+    def to_post(self) -> Post:
+        return dict(self)  # type: ignore [return-value]
+
+    def __repr__(self) -> str:
+        return f"PostView({self.to_post()!r})"
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from analyzer import AnalysisResults, Post, analyze_trends
+from postpack import PostPack
+from scraper import fetch_all_trends
+
+# الفاصل الزمني (بالثواني) بين كل عملية تحديث في الخلفية
+REFRESH_INTERVAL = float(os.getenv("TREND_REFRESH_INTERVAL", "300"))
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    لقطة ثابتة من المنشورات ونتائج تحليلها. لا يجب تعديل محتواها بعد نشرها.
+    المنشورات محفوظة في PostPack مضغوطة بدلاً من قاموس لكل منشور، لأن اللقطة تبقى في الذاكرة طوال فترة التحديث.
+    """
+    posts: PostPack
+    analysis: Optional[AnalysisResults]
+    created_at: float
+    version: int
+
+    @property
+    def age(self) -> float:
+        """عمر اللقطة بالثواني."""
+        return max(0.0, time.time() - self.created_at)
+
+class RefreshScheduler:
+    """
+    يشغّل سلسلة الجلب والتحليل في خيط خلفي كل فترة محددة، وينشر آخر لقطة ناجحة.
+    عند فشل التحديث تبقى اللقطة السابقة هي المعروضة.
+    """
+
+    def __init__(
+        self,
+        interval: float = REFRESH_INTERVAL,
+        fetch: Callable[[], List[Post]] = fetch_all_trends,
+        analyze: Callable[[List[Post]], Optional[AnalysisResults]] = analyze_trends,
+    ) -> None:
+        self.interval = interval
+        self._fetch = fetch
+        self._analyze = analyze
+        self._snapshot: Optional[Snapshot] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Snapshot], None]] = []
+        self.last_error: Optional[str] = None
+
+    def latest(self) -> Optional[Snapshot]:
+        """يعيد آخر لقطة منشورة (أو None إذا لم يكتمل أي تحديث بعد)."""
+        return self._snapshot
+
+    def add_listener(self, listener: Callable[[Snapshot], None]) -> None:
+        """يسجل دالة تُستدعى بعد نشر كل لقطة جديدة (مثل الحفظ في المخزن التاريخي)."""
+        self._listeners.append(listener)
+
+    def refresh(self) -> bool:
+        """ينفذ تحديثاً واحداً. يعيد True إذا نُشرت لقطة جديدة."""
+        with self._refresh_lock:
+            try:
+                posts = self._fetch()
+                if not posts:
+                    raise RuntimeError("لم يتم جلب أي منشورات من المصادر.")
+                analysis = self._analyze(posts)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"فشل تحديث التريندات، سيتم الاستمرار بعرض آخر لقطة ناجحة: {e}")
+                return False
+
+            with self._lock:
+                version = self._snapshot.version + 1 if self._snapshot else 1
+                snapshot = Snapshot(PostPack.from_posts(posts), analysis, time.time(), version)
+                self._snapshot = snapshot
+            self.last_error = None
+
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    print(f"فشل معالج ما بعد التحديث: {e}")
+            return True
+
+    def start(self) -> None:
+        """يبدأ خيط التحديث في الخلفية. استدعاؤه أكثر من مرة آمن."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="trend-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        """يشغّل حلقة التحديث في الخيط الحالي حتى استدعاء stop() (لعملية الجلب المستقلة worker.py)."""
+        self._run()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """ينتظر انتهاء أول محاولة تحديث (ناجحة أو فاشلة)."""
+        return self._ready.wait(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._ready.set()
+            self._stop.wait(self.interval)
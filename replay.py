@@ -0,0 +1,141 @@
+"""
+تسجيل وإعادة تشغيل ردود المصادر الخارجية (HTTP ونموذج التلخيص) من ملفات محلية،
+لقياس الأداء واختبار الانحدار دون أي اتصال بالشبكة.
+مثال: python replay.py record fixtures/run1
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Mapping, Optional
+
+import requests
+
+import httpcache
+import summarizer
+from httpcache import CachedResponse, HttpClient
+from summarizer import SummaryModel
+
+def _fixture_key(url: str, headers: Mapping[str, str]) -> str:
+    raw = json.dumps([url, sorted(headers.items())], ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def _prompt_key(prompt: str) -> str:
+    return hashlib.sha1(prompt.encode('utf-8')).hexdigest()
+
+class RecordingClient(HttpClient):
+    """عميل HTTP حقيقي يحفظ كل رد يستلمه في مجلد التسجيلات."""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = os.path.join(directory, 'http')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, url: str, headers: Optional[Mapping[str, str]] = None, timeout: float = 10,
+            use_cache: bool = True) -> CachedResponse:
+        response = super().get(url, headers=headers, timeout=timeout, use_cache=False)
+        save_response(self.directory, _fixture_key(url, headers or {}), response)
+        return response
+
+class ReplayClient(HttpClient):
+    """عميل HTTP يقرأ الردود من التسجيلات فقط؛ أي طلب غير مسجل يفشل بدلاً من الاتصال بالشبكة."""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = os.path.join(directory, 'http')
+        self._cache_lock = threading.Lock()
+        self._loaded: Dict[str, CachedResponse] = {}
+
+    def get(self, url: str, headers: Optional[Mapping[str, str]] = None, timeout: float = 10,
+            use_cache: bool = True) -> CachedResponse:
+        key = _fixture_key(url, headers or {})
+        with self._cache_lock:
+            response = self._loaded.get(key)
+        if response is None:
+            response = load_response(self.directory, key)
+            if response is None:
+                raise requests.exceptions.ConnectionError(f"لا يوجد رد مسجل للرابط: {url}")
+            with self._cache_lock:
+                self._loaded[key] = response
+        self.record(misses=1, bytes_downloaded=len(response.content))
+        return response
+
+def save_response(directory: str, key: str, response: CachedResponse) -> None:
+    with open(os.path.join(directory, f'{key}.body'), 'wb') as f:
+        f.write(response.content)
+    meta = {
+        'url': response.url,
+        'status_code': response.status_code,
+        'headers': dict(response.headers),
+        'encoding': response.encoding,
+    }
+    with open(os.path.join(directory, f'{key}.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+def load_response(directory: str, key: str) -> Optional[CachedResponse]:
+    try:
+        with open(os.path.join(directory, f'{key}.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, f'{key}.body'), 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    return CachedResponse(meta['url'], meta['status_code'], content, meta['headers'], meta.get('encoding'))
+
+class RecordingModel:
+    """يغلّف نموذج التلخيص ويحفظ كل رد حسب بصمة نص الطلب."""
+
+    def __init__(self, inner: SummaryModel, directory: str) -> None:
+        self.inner = inner
+        self.directory = os.path.join(directory, 'model')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def generate(self, prompt: str) -> str:
+        output = self.inner.generate(prompt)
+        with open(os.path.join(self.directory, f'{_prompt_key(prompt)}.txt'), 'w', encoding='utf-8') as f:
+            f.write(output)
+        return output
+
+class ReplayModel:
+    """نموذج يعيد الردود المسجلة فقط."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.join(directory, 'model')
+
+    def generate(self, prompt: str) -> str:
+        path = os.path.join(self.directory, f'{_prompt_key(prompt)}.txt')
+        try:
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            raise KeyError(f"لا يوجد رد مسجل لهذا الطلب: {_prompt_key(prompt)}") from None
+
+def install_recording(directory: str, model: Optional[SummaryModel] = None) -> None:
+    """يوجّه كل طلبات HTTP واستدعاءات النموذج عبر طبقة التسجيل."""
+    httpcache.set_client(RecordingClient(directory))
+    inner = model or summarizer.get_model()
+    if inner is not None:
+        summarizer.set_model(RecordingModel(inner, directory))
+
+def install_replay(directory: str) -> None:
+    """يستبدل الشبكة والنموذج بالتسجيلات المحفوظة في المجلد."""
+    httpcache.set_client(ReplayClient(directory))
+    summarizer.set_model(ReplayModel(directory))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="تسجيل ردود المصادر الخارجية لإعادة تشغيلها لاحقاً")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help="تشغيل fetch_all_trends مرة واحدة وحفظ كل الردود")
+    record.add_argument('directory')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        from scraper import fetch_all_trends
+
+        install_recording(args.directory)
+        posts = fetch_all_trends()
+        print(f"تم تسجيل ردود {len(posts)} منشوراً في {args.directory}")
+
+if __name__ == "__main__":
+    main()
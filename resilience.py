@@ -0,0 +1,144 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import metrics
+
+# عدد الإخفاقات المتتالية التي تفتح القاطع، ومدة الانتظار الأولى والقصوى (بالثواني) قبل إعادة المحاولة
+BREAKER_THRESHOLD = int(os.getenv("TREND_BREAKER_THRESHOLD", "3"))
+BREAKER_BASE_DELAY = float(os.getenv("TREND_BREAKER_BASE_DELAY", "60"))
+BREAKER_MAX_DELAY = float(os.getenv("TREND_BREAKER_MAX_DELAY", "1800"))
+# مدة حظر الرابط الفاشل أول مرة، وأقصى مدة حظر، وأقصى عدد روابط محفوظة
+NEGATIVE_CACHE_TTL = float(os.getenv("TREND_NEGATIVE_CACHE_TTL", "600"))
+NEGATIVE_CACHE_MAX_TTL = float(os.getenv("TREND_NEGATIVE_CACHE_MAX_TTL", "86400"))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("TREND_NEGATIVE_CACHE_MAX_ENTRIES", "4096"))
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    تأخير أسي مع تشويش (equal jitter): نصف المدة ثابت والنصف الآخر عشوائي،
+    حتى لا تعيد كل العمليات المحاولة في نفس اللحظة بعد انقطاع مشترك.
+    """
+    delay = min(maximum, base * (2 ** max(0, attempt)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class CircuitBreaker:
+    """
+    قاطع دائرة لكل مصدر خارجي: بعد threshold إخفاقات متتالية يُفتح فتُرفض الطلبات فوراً
+    حتى انتهاء مدة الانتظار، ثم يُسمح بمحاولة تجريبية واحدة (half-open): نجاحها يغلق القاطع،
+    وفشلها يعيد فتحه بمدة انتظار مضاعفة.
+    """
+
+    def __init__(self, name: str, threshold: int = BREAKER_THRESHOLD, base_delay: float = BREAKER_BASE_DELAY,
+                 max_delay: float = BREAKER_MAX_DELAY) -> None:
+        self.name = name
+        self.threshold = max(1, threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.last_error = ''
+        self._open_until = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.failures < self.threshold:
+                return 'closed'
+            if self._trial_in_flight or time.monotonic() >= self._open_until:
+                return 'half-open'
+            return 'open'
+
+    def retry_in(self) -> float:
+        """الثواني المتبقية حتى المحاولة التجريبية التالية (0 إذا كان القاطع مغلقاً)."""
+        with self._lock:
+            if self.failures < self.threshold:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+    def allow(self) -> bool:
+        """هل يُسمح بالطلب الآن؟ عند انتهاء مدة الانتظار يُسمح لطلب تجريبي واحد فقط."""
+        with self._lock:
+            if self.failures < self.threshold:
+                return True
+            if not self._trial_in_flight and time.monotonic() >= self._open_until:
+                self._trial_in_flight = True
+                return True
+        metrics.inc('trend_circuit_skips_total', breaker=self.name)
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.failures >= self.threshold:
+                print(f"عاد المصدر {self.name} للعمل، تم إغلاق القاطع.")
+            self.failures = 0
+            self.last_error = ''
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """يلغي المحاولة التجريبية الجارية دون احتساب نتيجتها (مثلاً عند إلغاء الطلب نفسه)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, error: str = '') -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            self._trial_in_flight = False
+            if self.failures < self.threshold:
+                return
+            delay = backoff_delay(self.failures - self.threshold, self.base_delay, self.max_delay)
+            self._open_until = time.monotonic() + delay
+        metrics.inc('trend_circuit_opened_total', breaker=self.name)
+        print(f"تم فتح قاطع المصدر {self.name} بعد {self.failures} إخفاقات متتالية، إعادة المحاولة بعد {delay:.0f} ثانية.")
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """يعيد قاطع الدائرة المشترك للاسم المحدد (يُنشأ عند أول استخدام)."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+class NegativeCache:
+    """
+    ذاكرة الروابط المعروف فشلها (مقال محذوف، حظر، صفحة بلا محتوى): الرابط يُتجاوز فوراً حتى انتهاء حظره.
+    مدة الحظر تتضاعف مع كل فشل جديد لنفس الرابط (مع تشويش)، ونجاح واحد يزيله.
+    """
+
+    def __init__(self, ttl: float = NEGATIVE_CACHE_TTL, max_ttl: float = NEGATIVE_CACHE_MAX_TTL,
+                 max_entries: int = NEGATIVE_CACHE_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.max_entries = max_entries
+        # الرابط -> (عدد الإخفاقات، نهاية الحظر)
+        self._entries: 'OrderedDict[str, Tuple[int, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def blocked(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                return False
+        metrics.inc('trend_negative_cache_hits_total')
+        return True
+
+    def record_failure(self, key: str) -> None:
+        with self._lock:
+            failures = self._entries[key][0] + 1 if key in self._entries else 1
+            # أول حظر يدوم بين ttl و2×ttl، ثم يتضاعف مع كل فشل جديد
+            until = time.monotonic() + backoff_delay(failures, self.ttl, self.max_ttl)
+            self._entries[key] = (failures, until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
@@ -1,223 +1,371 @@
-import re
-import json
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Sequence, Tuple, TypedDict
 
 import requests
-import google.generativeai as genai
-import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
+import httpcache
+import metrics
+from numparse import parse_count
+from resilience import get_breaker
 # استيراد تعريف Post من ملف التحليل لتجنب التكرار
 from analyzer import Post
-
-# --- إعداد Gemini API ---
-# Define the constant once from the environment.
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-try:
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)  # type: ignore [reportPrivateImportUsage]
-    else:
-        print("تحذير: لم يتم العثور على مفتاح GEMINI_API_KEY في ملف .env. سيتم تعطيل ميزة التلخيص.")
-except Exception as e:
-    print(f"حدث خطأ أثناء إعداد Gemini: {e}")
-
-def _parse_youtube_views(views_text: str) -> int:
-    """دالة مساعدة لتحويل نص عدد المشاهدات في يوتيوب إلى رقم صحيح."""
-    if not views_text:
-        return 0
-    # إزالة "مشاهدة" أو "views" والفاصلة
-    cleaned_text = views_text.lower().replace('مشاهدة', '').replace('views', '').replace(',', '').strip()
-    
-    # استخلاص الرقم فقط
-    value_text = ''.join(filter(lambda x: x.isdigit() or x == '.', cleaned_text))
-    if not value_text:
-        return 0
-        
-    value = float(value_text)
-
-    if 'k' in cleaned_text or 'ألف' in cleaned_text:
-        return int(value * 1000)
-    if 'm' in cleaned_text or 'مليون' in cleaned_text:
-        return int(value * 1000000)
-    
-    return int(value)
+from summarizer import summarize_article, summarize_many
+from yt_extract import extract_yt_initial_data
 
 def summarize_with_gemini(url: str) -> str:
     """
     يأخذ رابط مقال، يقرأ محتواه، ثم يستخدم Gemini لتلخيصه.
     """
-    if not GEMINI_API_KEY or not url or url == "#":  # Check the global flag
-        return "ميزة التلخيص معطلة."
+    return summarize_article(url)
+
+YOUTUBE_TRENDING_URL = "https://www.youtube.com/feed/trending"
+YOUTUBE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9,ar;q=0.8"
+}
+
+def parse_youtube_trending(content: bytes) -> List[Post]:
+    """
+    يستخرج فيديوهات التريند من HTML صفحة يوتيوب (مشتركة بين الجلب المتزامن وغير المتزامن).
+    يعيد قائمة فارغة إذا لم يعثر على البيانات في أي من المسارين المعروفين.
+    """
+    with metrics.timer('trend_stage_seconds', stage='youtube_parse'):
+        data = extract_yt_initial_data(content)
+    if data is None:
+        print("لم يتم العثور على بيانات التريند في صفحة يوتيوب.")
+        metrics.inc('trend_errors_total', stage='youtube')
+        return []
 
+    # --- مسار مرن للوصول إلى الفيديوهات ---
+    video_items = []
     try:
-        response = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # استخلاص الفقرات النصية من المقال
-        paragraphs = soup.find_all('p')
-        article_text = ' '.join([p.get_text() for p in paragraphs])
-
-        if not article_text:
-            return "لم يتم العثور على محتوى في الرابط."
-
-        model = genai.GenerativeModel('gemini-pro')  # type: ignore [reportPrivateImportUsage]
-        prompt = f"لخص المقال التالي في جملة واحدة موجزة باللغة العربية:\n\n{article_text[:3000]}" # نأخذ أول 3000 حرف لتجنب النصوص الطويلة جداً
-        summary_response = model.generate_content(prompt)  # type: ignore [reportUnknownMemberType]
-        return summary_response.text.strip()
-    except Exception as e:
-        print(f"فشل تلخيص الرابط {url}: {e}")
-        return "فشل في تلخيص المحتوى."
+        # Path 1 (Newer layout)
+        video_items = data['contents']['twoColumnBrowseResultsRenderer']['tabs'][0]['tabRenderer']['content']['richGridRenderer']['contents']
+    except (KeyError, IndexError, TypeError):
+        print("فشل المسار الأول ليوتيوب، جاري تجربة المسار الثاني...")
+        try:
+            # Path 2 (Older layout)
+            video_items = data['contents']['twoColumnBrowseResultsRenderer']['tabs'][0]['tabRenderer']['content']['sectionListRenderer']['contents'][0]['itemSectionRenderer']['contents']
+        except (KeyError, IndexError, TypeError) as e:
+            print(f"فشل المسار الثاني ليوتيوب أيضاً. لا يمكن جلب البيانات. الخطأ: {e}")
+            return []
 
+    youtube_trends: List[Post] = []
+    for item in video_items:
+        # Handle multiple possible data structures
+        video_renderer = None
+        if item.get('richItemRenderer'):
+            video_renderer = item.get('richItemRenderer', {}).get('content', {}).get('videoRenderer')
+        elif item.get('videoRenderer'):
+            video_renderer = item.get('videoRenderer')
+
+        if not video_renderer:
+            continue
+
+        # --- استخراج آمن للبيانات ---
+        video_id = video_renderer.get('videoId', '')
+        if not video_id: continue
+
+        title = video_renderer.get('title', {}).get('runs', [{}])[0].get('text', 'N/A')
+        views_text = video_renderer.get('viewCountText', {}).get('simpleText', '0')
+
+        nav_endpoint = video_renderer.get('navigationEndpoint', {})
+        web_command = nav_endpoint.get('commandMetadata', {}).get('webCommandMetadata', {})
+        video_url_path = web_command.get('url', '')
+
+        thumbnails = video_renderer.get('thumbnail', {}).get('thumbnails', [])
+        thumbnail_url = (thumbnails[-1].get('url') if thumbnails else "")
+
+        youtube_trends.append({
+            'platform': 'YouTube',
+            'title': title,
+            'views': parse_count(views_text),
+            'likes': 0, # الإعجابات غير متوفرة في صفحة التريند
+            'url': 'https://youtube.com' + video_url_path,
+            'thumbnail': thumbnail_url,
+            'channel': video_renderer.get('longBylineText', {}).get('runs', [{}])[0].get('text', 'N/A'),
+            'published_time': video_renderer.get('publishedTimeText', {}).get('simpleText', 'N/A'),
+            'summary': '' # لا يوجد تلخيص لفيديوهات يوتيوب حالياً
+        })
+    metrics.inc('trend_items_parsed_total', len(youtube_trends), source='youtube')
+    return youtube_trends
+
+@metrics.timed('trend_stage_seconds', stage='youtube')
 def scrape_youtube_trending() -> List[Post]:
     """يجلب أحدث التريندات من يوتيوب مع معلومات إضافية."""
     print("جاري جلب تريند يوتيوب...")
-    url = "https://www.youtube.com/feed/trending"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9,ar;q=0.8"
-    }
-    
-    youtube_trends: List[Post] = []
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = httpcache.get(YOUTUBE_TRENDING_URL, headers=YOUTUBE_HEADERS, timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        scripts = soup.find_all('script')
-        data_script = None
-        for script in scripts:
-            script_text = script.get_text()
-            if 'ytInitialData' in script_text:
-                data_script = script_text
-                break
-        
-        if not data_script: return []
-            
-        json_data_str = data_script.split(' = ')[1]
-        if json_data_str.endswith(';'): json_data_str = json_data_str[:-1]
-        data: Dict[str, Any] = json.loads(json_data_str)
-        
-        # --- مسار مرن للوصول إلى الفيديوهات ---
-        video_items = []
-        try:
-            # Path 1 (Newer layout)
-            video_items = data['contents']['twoColumnBrowseResultsRenderer']['tabs'][0]['tabRenderer']['content']['richGridRenderer']['contents']
-        except (KeyError, IndexError, TypeError):
-            print("فشل المسار الأول ليوتيوب، جاري تجربة المسار الثاني...")
-            try:
-                # Path 2 (Older layout)
-                video_items = data['contents']['twoColumnBrowseResultsRenderer']['tabs'][0]['tabRenderer']['content']['sectionListRenderer']['contents'][0]['itemSectionRenderer']['contents']
-            except (KeyError, IndexError, TypeError) as e:
-                print(f"فشل المسار الثاني ليوتيوب أيضاً. لا يمكن جلب البيانات. الخطأ: {e}")
-                return []
-        
-        for item in video_items:
-            # Handle multiple possible data structures
-            video_renderer = None
-            if item.get('richItemRenderer'):
-                video_renderer = item.get('richItemRenderer', {}).get('content', {}).get('videoRenderer')
-            elif item.get('videoRenderer'):
-                video_renderer = item.get('videoRenderer')
-
-            if not video_renderer:
-                continue
-
-            # --- استخراج آمن للبيانات ---
-            video_id = video_renderer.get('videoId', '')
-            if not video_id: continue
-
-            title = video_renderer.get('title', {}).get('runs', [{}])[0].get('text', 'N/A')
-            views_text = video_renderer.get('viewCountText', {}).get('simpleText', '0')
-            
-            nav_endpoint = video_renderer.get('navigationEndpoint', {})
-            web_command = nav_endpoint.get('commandMetadata', {}).get('webCommandMetadata', {})
-            video_url_path = web_command.get('url', '')
-
-            thumbnails = video_renderer.get('thumbnail', {}).get('thumbnails', [])
-            thumbnail_url = (thumbnails[-1].get('url') if thumbnails else "")
-
-            youtube_trends.append({
-                'platform': 'YouTube',
-                'title': title,
-                'views': _parse_youtube_views(views_text),
-                'likes': 0, # الإعجابات غير متوفرة في صفحة التريند
-                'url': 'https://youtube.com' + video_url_path,
-                'thumbnail': thumbnail_url,
-                'channel': video_renderer.get('longBylineText', {}).get('runs', [{}])[0].get('text', 'N/A'),
-                'published_time': video_renderer.get('publishedTimeText', {}).get('simpleText', 'N/A'),
-                'summary': '' # لا يوجد تلخيص لفيديوهات يوتيوب حالياً
-            })
-        return youtube_trends
+        return parse_youtube_trending(response.content)
     except requests.exceptions.RequestException as e:
         print(f"حدث خطأ في الشبكة أثناء جلب بيانات يوتيوب: {e}")
+        metrics.inc('trend_errors_total', stage='youtube')
         return []
     except Exception as e:
         print(f"حدث خطأ غير متوقع أثناء جلب بيانات يوتيوب: {e}")
+        metrics.inc('trend_errors_total', stage='youtube')
         return []
 
-def scrape_google_trends() -> List[Post]:
-    """يجلب أحدث المواضيع الرائجة من مؤشرات جوجل (للسعودية كمثال)."""
-    print("جاري جلب تريندات مؤشرات جوجل...")
-    # يمكنك تغيير geo=SA إلى بلد آخر مثل EG لمصر أو AE للإمارات
-    url = "https://trends.google.com/trends/trendingsearches/daily/rss?geo=SA"
+# المناطق التي تُجلب تريندات جوجل منها (رموز الدول مفصولة بفواصل)، وعدد التريندات المأخوذة من كل منطقة
+GOOGLE_TRENDS_GEOS = [geo.strip().upper() for geo in os.getenv("TREND_GOOGLE_GEOS", "SA").split(',') if geo.strip()]
+GOOGLE_TRENDS_PER_GEO = int(os.getenv("TREND_GOOGLE_PER_GEO", "5"))
+GOOGLE_TRENDS_RSS = "https://trends.google.com/trends/trendingsearches/daily/rss?geo={geo}"
+
+# مجمع خاص بطلبات المناطق، منفصل عن مجمع المصادر حتى لا ينتظر المصدر خيوطاً من نفس مجمعه
+_geo_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="trend-geo")
+
+def _parse_google_trends_rss(content: bytes, geo: str, limit: int) -> List[Post]:
+    """يحوّل ملف RSS لمنطقة واحدة إلى منشورات بدون ملخصات، مع ترتيب كل تريند وحجم بحثه في المنطقة."""
+    import xml.etree.ElementTree as ET
+
+    with metrics.timer('trend_stage_seconds', stage='google_trends_parse'):
+        root = ET.fromstring(content)
+
     google_trends: List[Post] = []
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        root = ET.fromstring(response.content)
-        
-        for item in root.findall('.//item')[:5]: # نأخذ أول 5 تريندات فقط لتجنب استهلاك API بشكل كبير
-            # --- معالجة آمنة للبيانات لتجنب الأخطاء ---
-            # جلب عدد المشاهدات مع قيمة افتراضية
-            traffic_el = item.find('{https://trends.google.com/trends/approx_traffic}approx_traffic')
-            views_text = traffic_el.text if traffic_el is not None and traffic_el.text else '0'
-            views = int(re.sub(r'[\+,]', '', views_text or '0'))
-
-            # جلب باقي البيانات مع قيم افتراضية
-            title_el = item.find('title')
-            title = (title_el.text or "بدون عنوان") if title_el is not None else "بدون عنوان"
-
-            link_el = item.find('link')
-            url = (link_el.text or "#") if link_el is not None else "#"
-
-            # --- استدعاء Gemini للتلخيص ---
-            # Only summarize if we have a valid URL
-            summary = summarize_with_gemini(url) if url and url != "#" else "لا يوجد رابط صالح للتلخيص."
-
-            thumbnail_el = item.find('{http://www.google.com/images/thumbnail}thumbnail')
-            thumbnail = (thumbnail_el.get('url') or "") if thumbnail_el is not None else ""
-
-            pub_date_el = item.find('pubDate')
-            published_time = (pub_date_el.text or "") if pub_date_el is not None else ""
-
-            google_trends.append({
-                'platform': 'Google Trends',
-                'title': title,
-                'views': views,
-                'likes': 0,
-                'url': url,
-                'thumbnail': thumbnail,
-                'channel': 'Google Search',
-                'published_time': published_time,
-                'summary': summary,
-            })
-        return google_trends
-    except requests.exceptions.RequestException as e:
-        print(f"حدث خطأ في الشبكة أثناء جلب بيانات مؤشرات جوجل: {e}")
+    for rank, item in enumerate(root.findall('.//item')[:limit], start=1): # نأخذ أول التريندات فقط لتجنب استهلاك API بشكل كبير
+        # --- معالجة آمنة للبيانات لتجنب الأخطاء ---
+        # جلب عدد المشاهدات مع قيمة افتراضية
+        traffic_el = item.find('{https://trends.google.com/trends/approx_traffic}approx_traffic')
+        views = parse_count(traffic_el.text if traffic_el is not None else None)
+
+        # جلب باقي البيانات مع قيم افتراضية
+        title_el = item.find('title')
+        title = (title_el.text or "بدون عنوان") if title_el is not None else "بدون عنوان"
+
+        link_el = item.find('link')
+        url = (link_el.text or "#") if link_el is not None else "#"
+
+        thumbnail_el = item.find('{http://www.google.com/images/thumbnail}thumbnail')
+        thumbnail = (thumbnail_el.get('url') or "") if thumbnail_el is not None else ""
+
+        pub_date_el = item.find('pubDate')
+        published_time = (pub_date_el.text or "") if pub_date_el is not None else ""
+
+        google_trends.append({
+            'platform': 'Google Trends',
+            'title': title,
+            'views': views,
+            'likes': 0,
+            'url': url,
+            'thumbnail': thumbnail,
+            'channel': 'Google Search',
+            'published_time': published_time,
+            'summary': '',
+            'regions': [{'geo': geo, 'rank': rank, 'traffic': views}],
+        })
+    return google_trends
+
+def _fetch_google_trends_geo(geo: str, limit: int) -> List[Post]:
+    response = httpcache.get(GOOGLE_TRENDS_RSS.format(geo=geo), timeout=10)
+    response.raise_for_status()
+    return _parse_google_trends_rss(response.content, geo, limit)
+
+def _dedupe_key(title: str) -> str:
+    return ' '.join(title.split()).casefold()
+
+def merge_regional_trends(per_geo: List[List[Post]]) -> List[Post]:
+    """
+    يدمج تريندات عدة مناطق: التريند الذي يظهر في أكثر من منطقة (بنفس العنوان بعد التوحيد أو بنفس الرابط)
+    يصبح سجلاً واحداً يحمل ترتيب وحجم بحث كل منطقة، ومشاهداته مجموع حجم البحث في كل المناطق.
+    الترتيب يتبع أول ظهور حسب ترتيب المناطق المحدد.
+    """
+    merged: List[Post] = []
+    by_title: Dict[str, Post] = {}
+    by_url: Dict[str, Post] = {}
+    for posts in per_geo:
+        for post in posts:
+            title_key = _dedupe_key(post['title'])
+            url = post['url'] if post['url'] != "#" else ''
+            existing = by_title.get(title_key) or (by_url.get(url) if url else None)
+            if existing is None:
+                existing = {**post, 'regions': list(post.get('regions', []))}
+                merged.append(existing)
+            else:
+                # تريندان مختلفان من نفس المنطقة قد يطابقان نفس السجل: نحتفظ بالأعلى ترتيباً فقط
+                known = {region['geo'] for region in existing['regions']}
+                new_regions = [region for region in post.get('regions', []) if region['geo'] not in known]
+                if new_regions:
+                    existing['regions'].extend(new_regions)
+                    existing['views'] += post['views']
+                if existing['url'] == "#" and url:
+                    existing['url'] = url
+            by_title.setdefault(title_key, existing)
+            if url:
+                by_url.setdefault(url, existing)
+    return merged
+
+@metrics.timed('trend_stage_seconds', stage='google_trends')
+def scrape_google_trends(geos: Optional[Sequence[str]] = None, limit: int = GOOGLE_TRENDS_PER_GEO) -> List[Post]:
+    """
+    يجلب أحدث المواضيع الرائجة من مؤشرات جوجل لكل المناطق المحددة بالتوازي (افتراضياً TREND_GOOGLE_GEOS).
+    التريندات المكررة بين المناطق تُدمج قبل التلخيص، فكل مقال يُلخص مرة واحدة فقط.
+    """
+    geos = [geo.upper() for geo in (geos if geos is not None else GOOGLE_TRENDS_GEOS)]
+    print(f"جاري جلب تريندات مؤشرات جوجل للمناطق: {', '.join(geos)}...")
+    if not geos:
         return []
-    except Exception as e:
-        print(f"حدث خطأ غير متوقع أثناء جلب بيانات مؤشرات جوجل: {e}")
+    futures = [_geo_executor.submit(_fetch_google_trends_geo, geo, limit) for geo in geos]
+
+    per_geo: List[List[Post]] = []
+    for geo, future in zip(geos, futures):
+        try:
+            per_geo.append(future.result())
+        except requests.exceptions.RequestException as e:
+            print(f"حدث خطأ في الشبكة أثناء جلب بيانات مؤشرات جوجل ({geo}): {e}")
+            metrics.inc('trend_errors_total', stage='google_trends')
+        except Exception as e:
+            print(f"حدث خطأ غير متوقع أثناء جلب بيانات مؤشرات جوجل ({geo}): {e}")
+            metrics.inc('trend_errors_total', stage='google_trends')
+
+    google_trends = merge_regional_trends(per_geo)
+
+    # --- استدعاء Gemini للتلخيص بالتوازي بعد جمع ودمج كل التريندات ---
+    # Only summarize if we have a valid URL
+    summaries = summarize_many(post['url'] for post in google_trends)
+    for post in google_trends:
+        post['summary'] = summaries.get(post['url'], "لا يوجد رابط صالح للتلخيص.")
+    metrics.inc('trend_items_parsed_total', len(google_trends), source='google_trends')
+    return google_trends
+
+# --- سجل المصادر: كل مصدر يعمل بالتوازي مع مهلة خاصة به ---
+# الميزانية الكلية (بالثواني) لعملية الجلب من جميع المصادر
+FETCH_BUDGET = float(os.getenv("TREND_FETCH_BUDGET", "40"))
+# أقصى عمر (بالثواني) لآخر بيانات ناجحة من مصدر، تُعرض بدلاً منه أثناء تعطله
+SOURCE_STALE_TTL = float(os.getenv("TREND_SOURCE_STALE_TTL", str(6 * 3600)))
+
+class SourceStatus(TypedDict):
+    ok: bool
+    items: int
+    elapsed: float
+    error: str
+    stale: bool  # المنشورات من آخر جلب ناجح وليست من هذا التحديث
+
+@dataclass
+class Source:
+    name: str
+    fetch: Callable[[], List[Post]]
+    deadline: float
+
+SOURCES: Dict[str, Source] = {}
+
+# مجمع خيوط مشترك: المصدر المتأخر لا يمنع إنهاء عملية الجلب الحالية
+_source_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="trend-source")
+
+def register_source(name: str, fetch: Callable[[], List[Post]], deadline: float) -> None:
+    """يضيف مصدراً جديداً (أو يستبدل مصدراً بنفس الاسم) إلى سجل المصادر."""
+    SOURCES[name] = Source(name=name, fetch=fetch, deadline=deadline)
+
+register_source('youtube', scrape_youtube_trending, deadline=20.0)
+# مهلة أطول لمؤشرات جوجل لأنها تشمل استدعاءات التلخيص
+register_source('google_trends', scrape_google_trends, deadline=35.0)
+
+def run_source(name: str) -> List[Post]:
+    """يشغّل مصدراً واحداً بالاسم (دالة على مستوى الوحدة حتى يمكن إرسالها إلى عملية أخرى)."""
+    return SOURCES[name].fetch()
+
+# --- حماية المصادر: قاطع دائرة لكل مصدر وآخر بيانات ناجحة ---
+# الحالة هنا في العملية التي تجمع النتائج، حتى عند تشغيل المصادر نفسها في مجمع عمليات
+_last_good: Dict[str, Tuple[float, List[Post]]] = {}
+_last_good_lock = threading.Lock()
+
+def _stale_posts(name: str) -> List[Post]:
+    with _last_good_lock:
+        entry = _last_good.get(name)
+    if entry is None or time.time() - entry[0] > SOURCE_STALE_TTL:
         return []
+    # نسخ معلّمة حتى لا تُحسب كقياسات جديدة في السجل التاريخي والتصدير وسرعة الصعود
+    return [{**post, 'stale': True} for post in entry[1]]  # type: ignore [misc]
+
+def _source_skipped(name: str) -> Tuple[List[Post], SourceStatus]:
+    """المصدر معطل (قاطعه مفتوح): لا يُشغّل ويُستخدم آخر جلب ناجح له."""
+    breaker = get_breaker(name)
+    posts = _stale_posts(name)
+    print(f"تم تجاوز المصدر {name} (متعطل منذ {breaker.failures} محاولات، إعادة المحاولة بعد {breaker.retry_in():.0f} ثانية).")
+    return posts, {'ok': False, 'items': len(posts), 'elapsed': 0.0, 'error': 'circuit open', 'stale': bool(posts)}
+
+def _source_finished(name: str, posts: List[Post], elapsed: float) -> Tuple[List[Post], SourceStatus]:
+    # المصدر الذي لا يعيد أي منشور يُعد فاشلاً (تغيّر شكل الصفحة أو حظر مؤقت)
+    if not posts:
+        return _source_failed(name, 'no items', elapsed)
+    get_breaker(name).record_success()
+    with _last_good_lock:
+        _last_good[name] = (time.time(), posts)
+    return posts, {'ok': True, 'items': len(posts), 'elapsed': elapsed, 'error': '', 'stale': False}
+
+def _source_failed(name: str, error: str, elapsed: float) -> Tuple[List[Post], SourceStatus]:
+    get_breaker(name).record_failure(error)
+    posts = _stale_posts(name)
+    return posts, {'ok': False, 'items': len(posts), 'elapsed': elapsed, 'error': error, 'stale': bool(posts)}
+
+def fetch_all_trends_with_status(budget: float = FETCH_BUDGET,
+                                 executor: Optional[Executor] = None) -> Tuple[List[Post], Dict[str, SourceStatus]]:
+    """
+    يشغّل جميع المصادر المسجلة بالتوازي، ويجمع نتائج كل مصدر فور انتهائه.
+    المصادر التي تتجاوز مهلتها (أو الميزانية الكلية) تُسجّل في قاموس الحالة ولا تؤخر الباقي.
+    المصدر الذي يفشل عدة مرات متتالية يُتجاوز فوراً حتى انتهاء مهلة قاطعه، وتُستخدم بدلاً منه
+    آخر منشورات ناجحة له (stale في قاموس الحالة).
+    يمكن تمرير مجمع عمليات (ProcessPoolExecutor) لتشغيل المصادر في عمليات منفصلة.
+    """
+    start = time.monotonic()
+    pool = executor or _source_executor
+    sources = list(SOURCES.values())
+    results: Dict[str, List[Post]] = {}
+    statuses: Dict[str, SourceStatus] = {}
+    futures: Dict[Future[List[Post]], Tuple[Source, float]] = {}
+    for source in sources:
+        if not get_breaker(source.name).allow():
+            results[source.name], statuses[source.name] = _source_skipped(source.name)
+            continue
+        deadline = start + min(source.deadline, budget)
+        futures[pool.submit(run_source, source.name)] = (source, deadline)
+
+    pending = set(futures)
+    while pending:
+        next_deadline = min(futures[f][1] for f in pending)
+        done, pending = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            source, _ = futures[future]
+            elapsed = time.monotonic() - start
+            try:
+                posts = future.result()
+            except Exception as e:
+                print(f"فشل المصدر {source.name}: {e}")
+                results[source.name], statuses[source.name] = _source_failed(source.name, str(e), elapsed)
+                continue
+            results[source.name], statuses[source.name] = _source_finished(source.name, posts, elapsed)
+
+        now = time.monotonic()
+        expired = {f for f in pending if futures[f][1] <= now}
+        for future in expired:
+            source, _ = futures[future]
+            future.cancel()
+            print(f"تجاوز المصدر {source.name} المهلة المحددة وتم تجاهله في هذا التحديث.")
+            results[source.name], statuses[source.name] = _source_failed(source.name, 'timeout', now - start)
+        pending -= expired
+
+    # الدمج بترتيب السجل لضمان ثبات ترتيب المنشورات بين التحديثات
+    all_posts: List[Post] = []
+    for source in sources:
+        all_posts.extend(results.get(source.name, []))
+    return all_posts, statuses
+
+def _report_stale(statuses: Dict[str, SourceStatus]) -> None:
+    stale = [f"{name} ({status['items']})" for name, status in statuses.items() if status['stale']]
+    if stale:
+        print(f"منشورات من آخر جلب ناجح (غير محدّثة): {', '.join(stale)}")
 
 def fetch_all_trends() -> List[Post]:
     """دالة رئيسية لتجميع التريندات من كل المصادر المتاحة."""
-    all_posts: List[Post] = []
     print("="*40)
     print("بدء عملية جلب التريندات من جميع المصادر...")
-    
-    all_posts.extend(scrape_youtube_trending())
-    all_posts.extend(scrape_google_trends())
-    
+
+    all_posts, statuses = fetch_all_trends_with_status()
+
     print(f"\nتم جلب ما مجموعه {len(all_posts)} منشوراً من جميع المصادر.")
+    _report_stale(statuses)
     return all_posts
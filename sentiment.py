@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence
+
+import metrics
+from keywords import normalize_arabic
+
+# --- إعدادات تحليل المشاعر ---
+# textblob (الافتراضي) أو lexicon (أسرع ويدعم العربية)
+SENTIMENT_SCORER = os.getenv("TREND_SENTIMENT_SCORER", "textblob")
+SENTIMENT_CACHE_SIZE = int(os.getenv("TREND_SENTIMENT_CACHE_SIZE", "50000"))
+# مسار اختياري لحفظ ذاكرة المشاعر على القرص بين عمليات التشغيل
+SENTIMENT_CACHE_PATH = os.getenv("TREND_SENTIMENT_CACHE")
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TOKEN_RE = re.compile(r'\w+')
+
+def normalize_title(title: str) -> str:
+    """يوحّد العنوان ليصبح مفتاحاً للذاكرة المؤقتة: مسافات موحدة وحروف صغيرة."""
+    return _WHITESPACE_RE.sub(' ', title).strip().lower()
+
+class SentimentScorer(Protocol):
+    """واجهة أي محلل مشاعر: يقيّم دفعة كاملة من العناوين في استدعاء واحد."""
+    name: str
+
+    def score_batch(self, titles: Sequence[str]) -> List[float]: ...
+
+class TextBlobScorer:
+    """المحلل الأصلي المعتمد على TextBlob (جيد للإنجليزية، بطيء، ويعيد غالباً 0.0 للعربية)."""
+    name = 'textblob'
+
+    def score_batch(self, titles: Sequence[str]) -> List[float]:
+        from textblob import TextBlob
+
+        return [TextBlob(title).sentiment.polarity for title in titles]
+
+# قاموس صغير مدمج للكلمات الشائعة في عناوين التريند (عربي وإنجليزي)
+_POSITIVE_WORDS = {
+    'رائع': 1.0, 'جميل': 0.8, 'مذهل': 1.0, 'مذهله': 1.0, 'ممتاز': 1.0, 'افضل': 0.7, 'احسن': 0.7,
+    'نجاح': 0.8, 'فوز': 0.8, 'يفوز': 0.7, 'سعيد': 0.8, 'سعاده': 0.8, 'فرح': 0.8, 'حب': 0.7,
+    'مبروك': 0.9, 'تتويج': 0.8, 'انجاز': 0.8, 'ثوري': 0.6, 'ثوريه': 0.6, 'جديد': 0.2,
+    'good': 0.7, 'great': 0.8, 'amazing': 1.0, 'awesome': 1.0, 'best': 1.0, 'love': 0.5,
+    'happy': 0.8, 'win': 0.8, 'wins': 0.8, 'success': 0.8, 'beautiful': 0.85, 'new': 0.14,
+}
+_NEGATIVE_WORDS = {
+    'فشل': -0.8, 'خيبه': -0.8, 'سيء': -0.7, 'سيئ': -0.7, 'اسوا': -1.0, 'حزين': -0.7, 'حزن': -0.7,
+    'كارثه': -1.0, 'مقتل': -0.9, 'وفاه': -0.7, 'حادث': -0.6, 'خساره': -0.7, 'يخسر': -0.6,
+    'هزيمه': -0.7, 'ازمه': -0.6, 'غضب': -0.7, 'جدل': -0.3, 'حاد': -0.3, 'فضيحه': -0.9,
+    'bad': -0.7, 'worst': -1.0, 'fail': -0.5, 'fails': -0.5, 'sad': -0.5, 'angry': -0.5,
+    'death': -0.6, 'dead': -0.2, 'crash': -0.6, 'loss': -0.5, 'terrible': -1.0, 'scandal': -0.7,
+}
+_NEGATIONS = frozenset(['لا', 'لم', 'لن', 'ليس', 'ليست', 'غير', 'not', 'no', 'never'])
+
+class LexiconScorer:
+    """محلل سريع يعتمد على قاموس كلمات عربي/إنجليزي مع معالجة بسيطة للنفي."""
+    name = 'lexicon'
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None) -> None:
+        source = lexicon if lexicon is not None else {**_POSITIVE_WORDS, **_NEGATIVE_WORDS}
+        self.lexicon = {normalize_arabic(word): score for word, score in source.items()}
+        self._negations = frozenset(normalize_arabic(word) for word in _NEGATIONS)
+
+    def score(self, title: str) -> float:
+        lexicon = self.lexicon
+        total = 0.0
+        matched = 0
+        negate = False
+        for raw in _TOKEN_RE.findall(title):
+            token = normalize_arabic(raw)
+            if token in self._negations:
+                negate = True
+                continue
+            value = lexicon.get(token)
+            if value is None and token.startswith('ال') and len(token) > 3:
+                value = lexicon.get(token[2:])
+            if value is not None:
+                total += -value if negate else value
+                matched += 1
+            negate = False
+        if not matched:
+            return 0.0
+        return max(-1.0, min(1.0, total / matched))
+
+    def score_batch(self, titles: Sequence[str]) -> List[float]:
+        score = self.score
+        return [score(title) for title in titles]
+
+_SCORERS = {'textblob': TextBlobScorer, 'lexicon': LexiconScorer}
+
+class SentimentCache:
+    """ذاكرة LRU محدودة الحجم لدرجات المشاعر، مفتاحها العنوان بعد التوحيد، مع حفظ اختياري على القرص."""
+
+    def __init__(self, max_size: int = SENTIMENT_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._entries: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        found: Dict[str, float] = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+                self.hits += 1
+        return found
+
+    def put_many(self, items: Dict[str, float]) -> None:
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def save(self, path: str, scorer_name: str) -> None:
+        with self._lock:
+            payload = {'scorer': scorer_name, 'scores': dict(self._entries)}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, scorer_name: str) -> None:
+        try:
+            with open(path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        # الدرجات المحفوظة من محلل مختلف غير صالحة
+        if payload.get('scorer') != scorer_name:
+            return
+        self.put_many({str(k): float(v) for k, v in payload.get('scores', {}).items()})
+
+class SentimentAnalyzer:
+    """يجمع بين المحلل والذاكرة المؤقتة: لا يُعاد تقييم عنوان سبق تقييمه."""
+
+    def __init__(self, scorer: Optional[SentimentScorer] = None, cache: Optional[SentimentCache] = None,
+                 persist_path: Optional[str] = None) -> None:
+        self.scorer: SentimentScorer = scorer or _SCORERS.get(SENTIMENT_SCORER, TextBlobScorer)()
+        self.cache = cache if cache is not None else SentimentCache()
+        self.persist_path = persist_path
+        if persist_path:
+            self.cache.load(persist_path, self.scorer.name)
+
+    def score_titles(self, titles: Sequence[str]) -> List[float]:
+        keys = [normalize_title(title) for title in titles]
+        scores = self.cache.get_many(set(keys))
+        # نمرر العنوان الأصلي لأول ظهور لكل مفتاح غير موجود في الذاكرة
+        missing: Dict[str, str] = {}
+        for key, title in zip(keys, titles):
+            if key not in scores and key not in missing:
+                missing[key] = title
+        if missing:
+            with metrics.timer('trend_stage_seconds', stage='sentiment'):
+                fresh = dict(zip(missing, self.scorer.score_batch(list(missing.values()))))
+            self.cache.put_many(fresh)
+            scores.update(fresh)
+            if self.persist_path:
+                try:
+                    self.cache.save(self.persist_path, self.scorer.name)
+                except OSError as e:
+                    print(f"تعذر حفظ ذاكرة المشاعر على القرص: {e}")
+        return [scores[key] for key in keys]
+
+_default_analyzer: Optional[SentimentAnalyzer] = None
+_default_lock = threading.Lock()
+
+def get_analyzer() -> SentimentAnalyzer:
+    """يعيد محلل المشاعر المشترك (يُنشأ عند أول استخدام)."""
+    global _default_analyzer
+    with _default_lock:
+        if _default_analyzer is None:
+            _default_analyzer = SentimentAnalyzer(persist_path=SENTIMENT_CACHE_PATH)
+        return _default_analyzer
+
+def set_analyzer(analyzer: Optional[SentimentAnalyzer]) -> None:
+    global _default_analyzer
+    with _default_lock:
+        _default_analyzer = analyzer
+
+def score_titles(titles: Sequence[str]) -> List[float]:
+    """درجات القطبية لقائمة عناوين، من -1 (سلبي جداً) إلى +1 (إيجابي جداً)."""
+    return get_analyzer().score_titles(titles)
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+from jsonfast import dumps, loads
+from postpack import PostPack
+from refresher import Snapshot
+
+# مسار ملف اللقطة المشتركة بين عملية الجلب (worker.py) وعمليات الويب
+SNAPSHOT_PATH = os.getenv("TREND_SNAPSHOT_PATH")
+# أقل فاصل (بالثواني) بين فحصين لرقم اللقطة في عمليات الويب
+SNAPSHOT_POLL_INTERVAL = float(os.getenv("TREND_SNAPSHOT_POLL_INTERVAL", "1"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS published (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+"""
+
+class SnapshotStore:
+    """
+    آخر لقطة منشورة في ملف SQLite مشترك: عملية الجلب تكتب، وعمليات الويب تقرأ فقط.
+    القارئ يحتفظ بنسخة محلية ولا يعيد فك اللقطة إلا عند تغيّر رقمها، فالطلب العادي
+    يكلف استعلاماً صغيراً واحداً على الأكثر كل SNAPSHOT_POLL_INTERVAL.
+    """
+
+    def __init__(self, path: str, poll_interval: float = SNAPSHOT_POLL_INTERVAL) -> None:
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._cached: Optional[Snapshot] = None
+        self._cached_key: Optional[Tuple[int, float]] = None
+        self._checked_at = 0.0
+
+    def publish(self, snapshot: Snapshot) -> None:
+        payload = dumps({'posts': snapshot.posts.to_posts(), 'analysis': snapshot.analysis})
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO published (id, version, created_at, payload) VALUES (1, ?, ?, ?)",
+                (snapshot.version, snapshot.created_at, payload),
+            )
+            self._conn.commit()
+
+    def latest(self) -> Optional[Snapshot]:
+        """يعيد آخر لقطة منشورة (أو None إذا لم تنشر عملية الجلب أي لقطة بعد)."""
+        now = time.monotonic()
+        if self._cached is not None and now - self._checked_at < self.poll_interval:
+            return self._cached
+
+        with self._lock:
+            row = self._conn.execute("SELECT version, created_at FROM published WHERE id = 1").fetchone()
+            self._checked_at = now
+            if row is None or (row[0], row[1]) == self._cached_key:
+                return self._cached
+            loaded = self._conn.execute("SELECT version, created_at, payload FROM published WHERE id = 1").fetchone()
+
+        version, created_at, payload = loaded
+        data = loads(payload)
+        snapshot = Snapshot(PostPack.from_posts(data['posts']), data['analysis'], created_at, version)
+        with self._lock:
+            self._cached, self._cached_key = snapshot, (version, created_at)
+        return snapshot
+
+    def start(self) -> None:
+        """لا شيء لتشغيله: الجلب يتم في عملية worker.py منفصلة (للتوافق مع واجهة RefreshScheduler)."""
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
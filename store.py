@@ -0,0 +1,171 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple, TypedDict
+
+from analyzer import Post
+
+# --- إعدادات مخزن التريندات التاريخي ---
+STORE_PATH = os.getenv("TREND_STORE_PATH", "trends_history.sqlite3")
+# حذف اللقطات الأقدم من هذه المدة (بالأيام)
+STORE_RETENTION_DAYS = float(os.getenv("TREND_STORE_RETENTION_DAYS", "90"))
+# اللقطات الأقدم من هذه المدة تُختصر إلى لقطة واحدة في الساعة
+STORE_DOWNSAMPLE_AFTER_DAYS = float(os.getenv("TREND_STORE_DOWNSAMPLE_AFTER_DAYS", "7"))
+STORE_COMPACT_INTERVAL = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posts (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    taken_at REAL NOT NULL,
+    platform TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title_hash INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    views INTEGER NOT NULL,
+    likes INTEGER NOT NULL,
+    channel TEXT,
+    thumbnail TEXT,
+    published_time TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at);
+CREATE INDEX IF NOT EXISTS posts_snapshot ON posts (snapshot_id);
+CREATE INDEX IF NOT EXISTS posts_url_time ON posts (url, taken_at);
+CREATE INDEX IF NOT EXISTS posts_platform_time ON posts (platform, taken_at);
+CREATE INDEX IF NOT EXISTS posts_title_hash_time ON posts (title_hash, taken_at);
+CREATE INDEX IF NOT EXISTS posts_time ON posts (taken_at);
+"""
+
+class TrendRow(TypedDict):
+    platform: str
+    url: str
+    title: str
+    max_views: int
+    appearances: int
+    first_seen: float
+    last_seen: float
+
+def title_hash(title: str) -> int:
+    """بصمة رقمية ثابتة (64 بت) للعنوان بعد توحيده، تُستخدم كفهرس."""
+    normalized = ' '.join(title.split()).lower()
+    digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+class TrendStore:
+    """
+    مخزن إلحاقي (append-only) محلي بصيغة SQLite لكل لقطات التريند مع توقيتها،
+    مفهرس حسب المنصة والرابط وبصمة العنوان للاستعلامات الزمنية السريعة.
+    """
+
+    def __init__(self, path: str = STORE_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._last_compacted = 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def append_snapshot(self, posts: Iterable[Post], taken_at: Optional[float] = None) -> int:
+        """يضيف لقطة كاملة في معاملة واحدة ويعيد رقمها."""
+        taken_at = time.time() if taken_at is None else taken_at
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT INTO snapshots (taken_at) VALUES (?)", (taken_at,))
+            snapshot_id = cursor.lastrowid or 0
+            self._conn.executemany(
+                "INSERT INTO posts (snapshot_id, taken_at, platform, url, title_hash, title, views, likes,"
+                " channel, thumbnail, published_time, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        snapshot_id, taken_at, post['platform'], post['url'], title_hash(post['title']),
+                        post['title'], post['views'], post['likes'], post.get('channel'),
+                        post.get('thumbnail'), post.get('published_time'), post.get('summary'),
+                    )
+                    for post in posts
+                ],
+            )
+        return snapshot_id
+
+    def views_over_time(self, url: str, since: Optional[float] = None) -> List[Tuple[float, int]]:
+        """سلسلة (الوقت، المشاهدات) لرابط واحد عبر كل اللقطات."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT taken_at, views FROM posts WHERE url = ? AND taken_at >= ? ORDER BY taken_at",
+                (url, since or 0.0),
+            ).fetchall()
+        return [(float(t), int(v)) for t, v in rows]
+
+    def title_over_time(self, title: str, since: Optional[float] = None) -> List[Tuple[float, str, int]]:
+        """سلسلة (الوقت، الرابط، المشاهدات) لكل منشور يحمل نفس العنوان."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT taken_at, url, views FROM posts WHERE title_hash = ? AND taken_at >= ? ORDER BY taken_at",
+                (title_hash(title), since or 0.0),
+            ).fetchall()
+        return [(float(t), str(u), int(v)) for t, u, v in rows]
+
+    def trending_since(self, hours: float = 24, platform: Optional[str] = None, limit: int = 50) -> List[TrendRow]:
+        """ما كان رائجاً خلال آخر عدد من الساعات، مرتباً حسب أعلى عدد مشاهدات."""
+        since = time.time() - hours * 3600
+        query = (
+            "SELECT platform, url, title, MAX(views), COUNT(*), MIN(taken_at), MAX(taken_at)"
+            " FROM posts WHERE taken_at >= ?"
+        )
+        params: List[object] = [since]
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+        query += " GROUP BY url ORDER BY MAX(views) DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                'platform': p, 'url': u, 'title': t, 'max_views': int(v),
+                'appearances': int(n), 'first_seen': float(f), 'last_seen': float(l),
+            }
+            for p, u, t, v, n, f, l in rows
+        ]
+
+    def snapshot_count(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()
+        return int(count)
+
+    def compact(self, retention_days: float = STORE_RETENTION_DAYS,
+                downsample_after_days: float = STORE_DOWNSAMPLE_AFTER_DAYS) -> int:
+        """
+        يبقي حجم المخزن محدوداً: يحذف ما هو أقدم من مدة الاحتفاظ،
+        ويختصر اللقطات القديمة إلى أول لقطة في كل ساعة. يعيد عدد اللقطات المحذوفة.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            expired = self._conn.execute(
+                "DELETE FROM snapshots WHERE taken_at < ?", (now - retention_days * 86400,)
+            ).rowcount
+            thinned = self._conn.execute(
+                "DELETE FROM snapshots WHERE taken_at < ? AND id NOT IN ("
+                " SELECT MIN(id) FROM snapshots WHERE taken_at < ? GROUP BY CAST(taken_at / 3600 AS INTEGER))",
+                (now - downsample_after_days * 86400, now - downsample_after_days * 86400),
+            ).rowcount
+        return expired + thinned
+
+    def compact_if_due(self, interval: float = STORE_COMPACT_INTERVAL) -> int:
+        """يشغّل الضغط مرة واحدة على الأكثر كل فترة محددة."""
+        now = time.time()
+        if now - self._last_compacted < interval:
+            return 0
+        self._last_compacted = now
+        return self.compact()
@@ -0,0 +1,437 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+import httpcache
+import metrics
+from article_extract import ARTICLE_CHUNK_SIZE, ArticleExtractor, ArticleTextCache, extract_text
+from httpcache import AsyncHttpClient
+from resilience import NegativeCache, get_breaker
+
+# --- إعداد Gemini API ---
+# Define the constant once from the environment.
+# مكتبة Gemini ثقيلة الاستيراد، لذا تُحمّل وتُهيأ عند أول استدعاء للنموذج فقط
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+if not GEMINI_API_KEY:
+    print("تحذير: لم يتم العثور على مفتاح GEMINI_API_KEY في ملف .env. سيتم تعطيل ميزة التلخيص.")
+
+# --- إعدادات التلخيص المتوازي والتخزين المؤقت ---
+SUMMARY_WORKERS = int(os.getenv("TREND_SUMMARY_WORKERS", "4"))
+# أقصى عدد لاستدعاءات النموذج في الثانية
+SUMMARY_RATE = float(os.getenv("TREND_SUMMARY_RATE", "2"))
+SUMMARY_CACHE_PATH = os.getenv("TREND_SUMMARY_CACHE", ".summary_cache.sqlite3")
+SUMMARY_CACHE_TTL = float(os.getenv("TREND_SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("TREND_SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+# نأخذ أول 3000 حرف لتجنب النصوص الطويلة جداً
+MAX_ARTICLE_CHARS = 3000
+ARTICLE_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+class SummaryModel(Protocol):
+    """
+    واجهة أي نموذج تلخيص: يستقبل نص الطلب ويعيد الملخص.
+    يمكن للنموذج أيضاً توفير generate_async للمسار غير المتزامن، وإلا يُستدعى generate في خيط منفصل.
+    """
+    def generate(self, prompt: str) -> str: ...
+
+class GeminiModel:
+    """نموذج التلخيص الافتراضي عبر Gemini."""
+
+    def __init__(self, model_name: str = 'gemini-pro', api_key: Optional[str] = None) -> None:
+        self.model_name = model_name
+        self.api_key = api_key or GEMINI_API_KEY
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    def _get_model(self) -> Any:
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self.api_key)  # type: ignore [reportPrivateImportUsage]
+                self._model = genai.GenerativeModel(self.model_name)  # type: ignore [reportPrivateImportUsage]
+            return self._model
+
+    def generate(self, prompt: str) -> str:
+        response = self._get_model().generate_content(prompt)  # type: ignore [reportUnknownMemberType]
+        return response.text.strip()
+
+    async def generate_async(self, prompt: str) -> str:
+        model = await asyncio.to_thread(self._get_model)
+        response = await model.generate_content_async(prompt)  # type: ignore [reportUnknownMemberType]
+        return response.text.strip()
+
+class FakeModel:
+    """نموذج محلي للاختبارات وقياس الأداء: يعيد أول جملة من المقال بعد تأخير اختياري."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._reply(prompt)
+
+    async def generate_async(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(prompt)
+
+    @staticmethod
+    def _reply(prompt: str) -> str:
+        article = prompt.split('\n\n', 1)[-1]
+        return article.split('.')[0].strip()[:200]
+
+_model: Optional[SummaryModel] = GeminiModel() if GEMINI_API_KEY else None
+
+def set_model(model: Optional[SummaryModel]) -> None:
+    """يستبدل نموذج التلخيص المستخدم (None لتعطيل التلخيص)."""
+    global _model
+    _model = model
+
+def get_model() -> Optional[SummaryModel]:
+    return _model
+
+class RateLimiter:
+    """محدد معدل بسيط (token bucket) آمن للاستخدام من عدة خيوط."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        """يأخذ رمزاً إن توفر ويعيد 0، وإلا يعيد مدة الانتظار حتى يتوفر الرمز التالي."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while (wait_for := self._try_acquire()) > 0:
+            time.sleep(wait_for)
+
+    async def acquire_async(self) -> None:
+        """مثل acquire لكن الانتظار لا يحجز خيطاً؛ نفس الرموز مشتركة مع المسار المتزامن."""
+        if self.rate <= 0:
+            return
+        while (wait_for := self._try_acquire()) > 0:
+            await asyncio.sleep(wait_for)
+
+class SummaryCache:
+    """
+    ذاكرة تخزين دائمة للملخصات على القرص (SQLite).
+    المفتاح هو الرابط مع بصمة نص المقال، مع صلاحية زمنية وإزالة الأقل استخداماً (LRU).
+    """
+
+    def __init__(self, path: str = SUMMARY_CACHE_PATH, ttl: float = SUMMARY_CACHE_TTL,
+                 max_entries: int = SUMMARY_CACHE_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " url TEXT NOT NULL, text_hash TEXT NOT NULL, summary TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL,"
+            " PRIMARY KEY (url, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_access ON summaries (last_access)")
+        self._conn.commit()
+
+    def get(self, url: str, text_hash: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE url = ? AND text_hash = ?",
+                (url, text_hash),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM summaries WHERE url = ? AND text_hash = ?", (url, text_hash))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE summaries SET last_access = ? WHERE url = ? AND text_hash = ?",
+                (now, url, text_hash),
+            )
+            self._conn.commit()
+            return row[0]
+
+    def latest(self, url: str) -> Optional[str]:
+        """آخر ملخص محفوظ للرابط بغض النظر عن نص المقال وصلاحيته (يُعرض عند تعذر التلخيص الآن)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE url = ? ORDER BY created_at DESC LIMIT 1", (url,),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, url: str, text_hash: str, summary: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (url, text_hash, summary, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, text_hash, summary, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE rowid IN ("
+                " SELECT rowid FROM summaries ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+_rate_limiter = RateLimiter(SUMMARY_RATE, burst=SUMMARY_WORKERS)
+# قاطع دائرة لاستدعاءات النموذج (نفاد الحصة أو تعطل الخدمة)، وذاكرة الروابط التي فشل جلبها مؤخراً
+_model_breaker = get_breaker('summarizer')
+_bad_urls = NegativeCache()
+_cache: Optional[SummaryCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> SummaryCache:
+    """يعيد ذاكرة الملخصات المشتركة (تُنشأ عند أول استخدام)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache()
+        return _cache
+
+def set_cache(cache: Optional[SummaryCache]) -> None:
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+# النص المستخلص لكل رابط: التحديثات المتتالية لا تعيد تنزيل نفس المقالات
+_article_cache = ArticleTextCache()
+
+def _fallback_summary(url: str) -> str:
+    """آخر ملخص ناجح للرابط إن وجد، بدلاً من رسالة الفشل."""
+    cached = get_cache().latest(url)
+    return cached if cached is not None else "فشل في تلخيص المحتوى."
+
+def extract_article_text(html: str) -> str:
+    """يستخلص أول MAX_ARTICLE_CHARS حرفاً من نص الفقرات في صفحة كاملة."""
+    with metrics.timer('trend_stage_seconds', stage='article_parse'):
+        return extract_text(html, MAX_ARTICLE_CHARS)
+
+def _read_article(url: str, validators: Dict[str, str]) -> Optional[str]:
+    """
+    يقرأ المقال بطلب واحد. يعيد None فقط إذا رد الخادم بـ 304 على طلب شرطي
+    بينما أُزيل النص المحفوظ من الذاكرة بين إرسال الطلب ووصول الرد.
+    """
+    headers = {**ARTICLE_HEADERS, **validators}
+    with httpcache.get_client().stream(url, timeout=10, headers=headers, chunk_size=ARTICLE_CHUNK_SIZE) as response:
+        if response.status_code == 304 and validators:
+            return _article_cache.revalidated(url)
+        response.raise_for_status()
+        extractor = ArticleExtractor(MAX_ARTICLE_CHARS, encoding=response.encoding)
+        with metrics.timer('trend_stage_seconds', stage='article_read'):
+            for chunk in response.chunks:  # type: ignore [union-attr]
+                if extractor.feed(chunk):
+                    break
+    metrics.inc('trend_article_bytes_total', extractor.bytes_read)
+    text = extractor.text()
+    _article_cache.put(url, text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return text
+
+def fetch_article_text(url: str) -> str:
+    """
+    يقرأ المقال على دفعات ويمررها لمحلل تزايدي يجمع نص الفقرات فقط، ويتوقف عن القراءة بمجرد جمع
+    MAX_ARTICLE_CHARS حرفاً أو بلوغ TREND_ARTICLE_MAX_BYTES، فلا يُنزَّل ولا يُحلل باقي الصفحة.
+    بعد انتهاء صلاحية النص المحفوظ يُرسل طلب شرطي، ورد 304 يعيد استخدام النص دون تنزيل المقال.
+    """
+    cached = _article_cache.get(url)
+    if cached is not None:
+        return cached
+
+    text = _read_article(url, _article_cache.validators(url))
+    if text is None:
+        # رد 304 لنص لم يعد محفوظاً: إعادة الطلب مرة واحدة دون ترويسات شرطية بدلاً من اعتبار الرابط فاشلاً
+        text = _read_article(url, {})
+    return text or ''
+
+async def _read_article_async(url: str, client: AsyncHttpClient, validators: Dict[str, str]) -> Optional[str]:
+    """النسخة غير المتزامنة من _read_article."""
+    headers = {**ARTICLE_HEADERS, **validators}
+    async with client.stream(url, timeout=10, headers=headers, chunk_size=ARTICLE_CHUNK_SIZE) as response:
+        if response.status_code == 304 and validators:
+            return _article_cache.revalidated(url)
+        response.raise_for_status()
+        extractor = ArticleExtractor(MAX_ARTICLE_CHARS, encoding=response.encoding)
+        with metrics.timer('trend_stage_seconds', stage='article_read'):
+            async for chunk in response.chunks:  # type: ignore [union-attr]
+                if extractor.feed(chunk):
+                    break
+    metrics.inc('trend_article_bytes_total', extractor.bytes_read)
+    text = extractor.text()
+    _article_cache.put(url, text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return text
+
+async def fetch_article_text_async(url: str, client: AsyncHttpClient) -> str:
+    """النسخة غير المتزامنة من fetch_article_text (نفس المحلل التزايدي ونفس ذاكرة النصوص والطلبات الشرطية)."""
+    cached = _article_cache.get(url)
+    if cached is not None:
+        return cached
+
+    text = await _read_article_async(url, client, _article_cache.validators(url))
+    if text is None:
+        text = await _read_article_async(url, client, {})
+    return text or ''
+
+def _excerpt(article_text: str) -> Tuple[str, str]:
+    """الجزء المرسل للنموذج وبصمته المستخدمة كمفتاح في ذاكرة الملخصات."""
+    excerpt = article_text[:MAX_ARTICLE_CHARS]
+    return excerpt, hashlib.sha256(excerpt.encode('utf-8')).hexdigest()
+
+def _prompt(excerpt: str) -> str:
+    return f"لخص المقال التالي في جملة واحدة موجزة باللغة العربية:\n\n{excerpt}"
+
+@metrics.timed('trend_stage_seconds', stage='summarize')
+def summarize_article(url: str) -> str:
+    """
+    يأخذ رابط مقال، يقرأ محتواه، ثم يلخصه بالنموذج المحدد مع الاستفادة من الذاكرة المؤقتة.
+    الروابط التي فشلت مؤخراً تُتجاوز فوراً، وكذلك النموذج عندما يكون قاطعه مفتوحاً؛
+    وفي الحالتين يُعاد آخر ملخص ناجح للرابط إن وجد.
+    """
+    model = _model
+    if model is None or not url or url == "#":
+        return "ميزة التلخيص معطلة."
+    if _bad_urls.blocked(url):
+        return _fallback_summary(url)
+
+    try:
+        try:
+            article_text = fetch_article_text(url)
+        except Exception:
+            _bad_urls.record_failure(url)
+            raise
+        if not article_text:
+            _bad_urls.record_failure(url)
+            return "لم يتم العثور على محتوى في الرابط."
+        _bad_urls.record_success(url)
+
+        excerpt, text_hash = _excerpt(article_text)
+        cache = get_cache()
+        cached = cache.get(url, text_hash)
+        if cached is not None:
+            return cached
+
+        if not _model_breaker.allow():
+            return _fallback_summary(url)
+        _rate_limiter.acquire()
+        try:
+            with metrics.timer('trend_stage_seconds', stage='model'):
+                summary = model.generate(_prompt(excerpt))
+        except Exception as e:
+            _model_breaker.record_failure(str(e))
+            raise
+        _model_breaker.record_success()
+        cache.put(url, text_hash, summary)
+        return summary
+    except Exception as e:
+        print(f"فشل تلخيص الرابط {url}: {e}")
+        metrics.inc('trend_errors_total', stage='summarize')
+        return _fallback_summary(url)
+
+def summarize_many(urls: Iterable[str], max_workers: int = SUMMARY_WORKERS) -> Dict[str, str]:
+    """يلخص عدة روابط بالتوازي عبر مجمع خيوط محدود، ويعيد قاموساً من الرابط إلى الملخص."""
+    unique_urls: List[str] = list(dict.fromkeys(u for u in urls if u and u != "#"))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_urls))),
+                            thread_name_prefix="trend-summary") as executor:
+        pairs: List[Tuple[str, str]] = list(zip(unique_urls, executor.map(summarize_article, unique_urls)))
+    return dict(pairs)
+
+async def summarize_article_async(url: str, client: AsyncHttpClient) -> str:
+    """
+    النسخة غير المتزامنة من summarize_article: جلب المقال واستدعاء النموذج لا يحجزان خيطاً،
+    أما ذاكرة الملخصات (SQLite) فتعمل في خيط منفصل حتى لا توقف حلقة الأحداث.
+    """
+    model = _model
+    if model is None or not url or url == "#":
+        return "ميزة التلخيص معطلة."
+    if _bad_urls.blocked(url):
+        return await asyncio.to_thread(_fallback_summary, url)
+
+    try:
+        try:
+            article_text = await fetch_article_text_async(url, client)
+        except Exception:
+            _bad_urls.record_failure(url)
+            raise
+        if not article_text:
+            _bad_urls.record_failure(url)
+            return "لم يتم العثور على محتوى في الرابط."
+        _bad_urls.record_success(url)
+
+        excerpt, text_hash = _excerpt(article_text)
+        cache = get_cache()
+        cached = await asyncio.to_thread(cache.get, url, text_hash)
+        if cached is not None:
+            return cached
+
+        if not _model_breaker.allow():
+            return await asyncio.to_thread(_fallback_summary, url)
+        generate_async = getattr(model, 'generate_async', None)
+        try:
+            await _rate_limiter.acquire_async()
+            with metrics.timer('trend_stage_seconds', stage='model'):
+                if generate_async is not None:
+                    summary = await generate_async(_prompt(excerpt))
+                else:
+                    summary = await asyncio.to_thread(model.generate, _prompt(excerpt))
+        except asyncio.CancelledError:
+            # الإلغاء (تجاوز مهلة المصدر) ليس فشلاً للنموذج: تُلغى المحاولة التجريبية فقط إن وجدت
+            _model_breaker.release()
+            raise
+        except Exception as e:
+            _model_breaker.record_failure(str(e))
+            raise
+        _model_breaker.record_success()
+        await asyncio.to_thread(cache.put, url, text_hash, summary)
+        return summary
+    except Exception as e:
+        print(f"فشل تلخيص الرابط {url}: {e}")
+        metrics.inc('trend_errors_total', stage='summarize')
+        return await asyncio.to_thread(_fallback_summary, url)
+
+async def summarize_many_async(urls: Iterable[str], client: AsyncHttpClient,
+                               max_concurrency: int = SUMMARY_WORKERS) -> Dict[str, str]:
+    """يلخص عدة روابط بالتزامن مع حد أقصى للطلبات الجارية، ويعيد قاموساً من الرابط إلى الملخص."""
+    unique_urls: List[str] = list(dict.fromkeys(u for u in urls if u and u != "#"))
+    if not unique_urls:
+        return {}
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _one(url: str) -> str:
+        async with semaphore:
+            return await summarize_article_async(url, client)
+
+    summaries = await asyncio.gather(*(_one(url) for url in unique_urls))
+    return dict(zip(unique_urls, summaries))
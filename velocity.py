@@ -0,0 +1,158 @@
+import heapq
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from analyzer import AnalysisResults, Post, RisingInfo, RisingKeyword, title_words
+
+# الحد الأقصى للعناصر المتتبعة (لكل من الروابط والكلمات)؛ الأقدم تحديثاً يُحذف أولاً
+VELOCITY_MAX_ITEMS = int(os.getenv("TREND_VELOCITY_MAX_ITEMS", "20000"))
+# وزن آخر قياس في المتوسط المتحرك الأسي
+VELOCITY_ALPHA = float(os.getenv("TREND_VELOCITY_ALPHA", "0.3"))
+VELOCITY_Z_THRESHOLD = float(os.getenv("TREND_VELOCITY_Z_THRESHOLD", "3.0"))
+# عدد قياسات السرعة المطلوبة قبل الحكم على أي قفزة بأنها شاذة
+VELOCITY_MIN_SAMPLES = 3
+# حد أدنى للانحراف المعياري كنسبة من السرعة، حتى لا يتحول النمو المنتظم جداً (تباين قريب من الصفر) إلى شذوذ
+VELOCITY_MIN_STD_RATIO = 0.1
+FASTEST_RISING_COUNT = 5
+
+class _Track:
+    """حالة عنصر واحد: آخر قيمة، ومتوسط وتباين أسيان لسرعته. كل تحديث O(1)."""
+    __slots__ = ('value', 'seen_at', 'velocity', 'variance', 'acceleration', 'zscore', 'samples')
+
+    def __init__(self, value: float, seen_at: float) -> None:
+        self.value = value
+        self.seen_at = seen_at
+        self.velocity = 0.0
+        self.variance = 0.0
+        self.acceleration = 0.0
+        self.zscore = 0.0
+        self.samples = 0
+
+    def update(self, value: float, seen_at: float, alpha: float) -> None:
+        hours = (seen_at - self.seen_at) / 3600
+        if hours <= 0:
+            return
+        rate = (value - self.value) / hours
+        self.value, self.seen_at = value, seen_at
+        if self.samples == 0:
+            self.velocity = rate
+            self.samples = 1
+            return
+
+        # z-score مقابل الحالة قبل إدخال القياس الجديد، ثم تحديث المتوسط والتباين الأسيين
+        diff = rate - self.velocity
+        std = max(math.sqrt(self.variance), abs(self.velocity) * VELOCITY_MIN_STD_RATIO, 1.0)
+        self.zscore = diff / std
+        increment = alpha * diff
+        previous = self.velocity
+        self.velocity += increment
+        self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.acceleration = (self.velocity - previous) / hours
+        self.samples += 1
+
+class _TrackTable:
+    """جدول عناصر محدود الحجم بترتيب آخر تحديث (LRU)."""
+
+    def __init__(self, max_items: int, alpha: float) -> None:
+        self.max_items = max_items
+        self.alpha = alpha
+        self._tracks: 'OrderedDict[Hashable, _Track]' = OrderedDict()
+
+    def observe(self, key: Hashable, value: float, seen_at: float) -> _Track:
+        track = self._tracks.get(key)
+        if track is None:
+            track = self._tracks[key] = _Track(value, seen_at)
+            if len(self._tracks) > self.max_items:
+                self._tracks.popitem(last=False)
+        else:
+            track.update(value, seen_at, self.alpha)
+            self._tracks.move_to_end(key)
+        return track
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+class TrendVelocity:
+    """
+    يتتبع سرعة نمو المشاهدات لكل رابط ولكل كلمة مفتاحية عبر اللقطات المتتالية،
+    ويحدد العناصر الأسرع صعوداً والقفزات الشاذة (z-score فوق الحد) في سرعتها.
+    الذاكرة محدودة بعدد ثابت من العناصر مهما زاد عدد الروابط والكلمات.
+    """
+
+    def __init__(self, max_items: int = VELOCITY_MAX_ITEMS, alpha: float = VELOCITY_ALPHA,
+                 z_threshold: float = VELOCITY_Z_THRESHOLD, top: int = FASTEST_RISING_COUNT) -> None:
+        self.z_threshold = z_threshold
+        self.top = top
+        self._urls = _TrackTable(max_items, alpha)
+        self._keywords = _TrackTable(max_items, alpha)
+
+    def update(self, posts: Sequence[Post], now: Optional[float] = None) -> Tuple[List[RisingInfo], List[RisingKeyword]]:
+        """يسجل لقطة جديدة ويعيد الأسرع صعوداً من الروابط والكلمات الموجودة فيها."""
+        now = time.time() if now is None else now
+
+        # الرابط المكرر في نفس اللقطة يُحسب بأعلى مشاهداته، والكلمة بمجموع مشاهدات عناوينها
+        # منشورات المصادر المتعطلة (stale) قيمها قديمة: تُترك سرعتها وسرعة كلماتها دون تحديث في هذه اللقطة
+        # حتى لا تظهر كنمو صفري أثناء الانقطاع ثم كقفزة شاذة عند عودة المصدر
+        by_url: Dict[str, Post] = {}
+        keyword_views: Dict[str, int] = {}
+        stale_words: Set[str] = set()
+        for post in posts:
+            if post.get('stale'):
+                stale_words.update(title_words(post['title']))
+                continue
+            url = post['url']
+            if url and url != "#" and (url not in by_url or post['views'] > by_url[url]['views']):
+                by_url[url] = post
+            for word in set(title_words(post['title'])):
+                keyword_views[word] = keyword_views.get(word, 0) + post['views']
+
+        rising: List[Tuple[_Track, Post]] = []
+        for url, post in by_url.items():
+            track = self._urls.observe(url, post['views'], now)
+            # العناصر الثابتة أو المتراجعة لا تُعرض كصاعدة حتى لو قل عدد الصاعد فعلاً عن top
+            if track.samples and track.velocity > 0:
+                rising.append((track, post))
+        rising_words: List[Tuple[_Track, str]] = []
+        for word, views in keyword_views.items():
+            if word in stale_words:
+                continue
+            track = self._keywords.observe(word, views, now)
+            if track.samples and track.velocity > 0:
+                rising_words.append((track, word))
+
+        def by_velocity(item: Tuple[_Track, object]) -> float:
+            return item[0].velocity
+
+        fastest: List[RisingInfo] = [
+            {
+                'post': post,
+                'velocity': track.velocity,
+                'acceleration': track.acceleration,
+                'zscore': track.zscore,
+                'anomaly': self._is_anomaly(track),
+            }
+            for track, post in heapq.nlargest(self.top, rising, key=by_velocity)
+        ]
+        keywords: List[RisingKeyword] = [
+            {'keyword': word, 'velocity': track.velocity, 'zscore': track.zscore, 'anomaly': self._is_anomaly(track)}
+            for track, word in heapq.nlargest(self.top, rising_words, key=by_velocity)
+        ]
+        return fastest, keywords
+
+    def annotate(self, analysis: Optional[AnalysisResults], posts: Sequence[Post],
+                 now: Optional[float] = None) -> Optional[AnalysisResults]:
+        """يضيف قسمي الأسرع صعوداً إلى نتيجة التحليل."""
+        if analysis is None:
+            return None
+        analysis['fastest_rising'], analysis['rising_keywords'] = self.update(posts, now)
+        return analysis
+
+    def _is_anomaly(self, track: _Track) -> bool:
+        return track.samples >= VELOCITY_MIN_SAMPLES and track.zscore >= self.z_threshold
+
+    def tracked(self) -> Tuple[int, int]:
+        """عدد الروابط والكلمات المتتبعة حالياً."""
+        return len(self._urls), len(self._keywords)
@@ -0,0 +1,53 @@
+"""
+عملية الجلب المنفصلة عن خادم الويب: تشغّل المصادر في مجمع عمليات، وتحلل النتائج،
+وتنشر كل لقطة في ملف مشترك تقرأ منه كل عمليات الويب (TREND_SNAPSHOT_PATH).
+مثال:
+    TREND_SNAPSHOT_PATH=trends_snapshot.sqlite3 python worker.py
+    TREND_SNAPSHOT_PATH=trends_snapshot.sqlite3 gunicorn -w 4 app:app
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from analyzer import Post
+from pipeline import AnalysisPipeline, attach_export, attach_history
+from refresher import REFRESH_INTERVAL, RefreshScheduler
+from scraper import FETCH_BUDGET, SOURCES, fetch_all_trends_with_status
+from snapshot_store import SNAPSHOT_PATH, SnapshotStore
+
+# عدد العمليات التي تشغّل المصادر (التحليل والكتابة يتمان في العملية الرئيسية)
+WORKER_PROCESSES = int(os.getenv("TREND_WORKER_PROCESSES", "0")) or None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="عملية جلب وتحليل التريندات ونشرها للويب")
+    parser.add_argument('--snapshot-path', default=SNAPSHOT_PATH or "trends_snapshot.sqlite3")
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL)
+    parser.add_argument('--processes', type=int, default=WORKER_PROCESSES)
+    parser.add_argument('--once', action='store_true', help="تحديث واحد ثم الخروج")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.snapshot_path)
+    processes = args.processes or min(len(SOURCES), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        def fetch() -> List[Post]:
+            posts, _ = fetch_all_trends_with_status(FETCH_BUDGET, executor=executor)
+            return posts
+
+        scheduler = RefreshScheduler(interval=args.interval, fetch=fetch, analyze=AnalysisPipeline())
+        scheduler.add_listener(store.publish)
+        attach_history(scheduler)
+        attach_export(scheduler)
+        print(f"بدء عملية الجلب: {processes} عملية، النشر في {args.snapshot_path}")
+
+        if args.once:
+            if not scheduler.refresh():
+                raise SystemExit(f"فشل التحديث: {scheduler.last_error}")
+            return
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import json
+import re
+from typing import Any, Dict, Optional
+
+from jsonfast import JSON_BACKEND, loads  # noqa: F401  (JSON_BACKEND يُعرض في bench.py)
+
+_MARKER = b'ytInitialData'
+# ما يلي اسم المتغير حتى بداية الكائن: `ytInitialData = {` أو `window["ytInitialData"] = {`
+_ASSIGNMENT_RE = re.compile(rb'["\']?\]?\s*=\s*(?={)')
+_SCRIPT_END = b';</script>'
+
+def extract_yt_initial_data(body: bytes) -> Optional[Dict[str, Any]]:
+    """
+    يستخرج كائن ytInitialData مباشرة من بايتات صفحة يوتيوب دون بناء شجرة HTML كاملة.
+    يبحث عن موضع الإسناد ثم يمرر مقطع JSON فقط إلى المفكك.
+    """
+    pos = body.find(_MARKER)
+    while pos != -1:
+        match = _ASSIGNMENT_RE.match(body, pos + len(_MARKER))
+        if match:
+            return _decode_object(body, match.end())
+        pos = body.find(_MARKER, pos + len(_MARKER))
+    return None
+
+def _decode_object(body: bytes, start: int) -> Optional[Dict[str, Any]]:
+    # المسار السريع: الكائن ينتهي عادةً بـ `;</script>`
+    end = body.find(_SCRIPT_END, start)
+    if end != -1:
+        try:
+            data = loads(body[start:end])
+            return data if isinstance(data, dict) else None
+        except ValueError:
+            pass
+
+    # المسار الاحتياطي: فك أول كائن JSON كامل وتجاهل ما بعده
+    try:
+        data, _ = json.JSONDecoder().raw_decode(body[start:].decode('utf-8', errors='replace'))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None